@@ -6,23 +6,81 @@ Handles AI-powered quote generation and domain suggestions via OpenRouter.
 import os
 import json
 import re
-from typing import Optional
-from openai import OpenAI
+import asyncio
+import hashlib
+import time
+from typing import Optional, AsyncIterator
+import httpx
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
+import pricing
+from model_router import model_router
+from quote_cache import quote_cache, normalize_quote_inputs, cache_key
+from discovery_cache import discovery_cache, names_client
+
 # Load environment variables
 load_dotenv()
 
 # Initialize OpenRouter client
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Connection pool for the async client (shared by every concurrent LLM call)
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "100"))
+OPENROUTER_MAX_KEEPALIVE = int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "20"))
+OPENROUTER_KEEPALIVE_EXPIRY = float(os.getenv("OPENROUTER_KEEPALIVE_EXPIRY", "120"))
+OPENROUTER_TIMEOUT = float(os.getenv("OPENROUTER_TIMEOUT", "60"))
+OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "true").lower() == "true"
+
+OPENROUTER_HEADERS = {
+    "HTTP-Referer": "http://localhost:3000",
+    "X-Title": "VectorWeb Labs",
+}
 
 client: Optional[OpenAI] = None
 if OPENROUTER_API_KEY:
     client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
+        base_url=OPENROUTER_BASE_URL,
         api_key=OPENROUTER_API_KEY,
     )
 
+# Shared async client; created by the app lifespan (or on first use)
+async_client: Optional[AsyncOpenAI] = None
+
+
+def get_async_client() -> Optional[AsyncOpenAI]:
+    """
+    Return the process-wide async OpenRouter client, or None in mock mode.
+    One pooled HTTP/2 keep-alive connection set is reused for every call.
+    """
+    global async_client
+    if async_client is None and OPENROUTER_API_KEY:
+        async_client = AsyncOpenAI(
+            base_url=OPENROUTER_BASE_URL,
+            api_key=OPENROUTER_API_KEY,
+            http_client=httpx.AsyncClient(
+                http2=OPENROUTER_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=OPENROUTER_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENROUTER_MAX_KEEPALIVE,
+                    keepalive_expiry=OPENROUTER_KEEPALIVE_EXPIRY,
+                ),
+                timeout=OPENROUTER_TIMEOUT,
+            ),
+        )
+    return async_client
+
+
+async def close_async_client() -> None:
+    """
+    Close the shared client's connection pool. Called on app shutdown.
+    """
+    global async_client
+    if async_client is not None:
+        await async_client.close()
+        async_client = None
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # VECTORWEB SCOUT SYSTEM PROMPT
@@ -76,58 +134,179 @@ def _strip_markdown_json(text: str) -> str:
     return text.strip()
 
 
-def _call_openrouter(system_prompt: str, user_prompt: str) -> str:
+
+
+def _call_openrouter(system_prompt: str, user_prompt: str, task: str = "default") -> str:
     """
     Make a call to OpenRouter and return the response content.
+    Uses the router's preferred model for the task (no hedging on this path).
     """
     if not client:
         raise RuntimeError("OpenRouter API key not configured")
     
-    completion = client.chat.completions.create(
-        extra_headers={
-            "HTTP-Referer": "http://localhost:3000",
-            "X-Title": "VectorWeb Labs",
-        },
-        model="meta-llama/llama-3.3-70b-instruct:free",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ]
+    model = model_router.pick(task)
+    started = time.monotonic()
+    try:
+        completion = client.chat.completions.create(
+            extra_headers=OPENROUTER_HEADERS,
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ]
+        )
+    except Exception:
+        model_router.record(model, time.monotonic() - started, ok=False)
+        raise
+    model_router.record(model, time.monotonic() - started, ok=True)
+    return completion.choices[0].message.content
+
+
+# Single-flight: identical in-flight calls share one upstream request
+_inflight: dict[tuple[str, str, str], asyncio.Task] = {}
+_waiters: dict[asyncio.Task, int] = {}  # callers still awaiting each shared request
+single_flight_stats = {"calls": 0, "upstream": 0, "coalesced": 0, "cancelled": 0}
+
+
+async def _request_completion(messages: list[dict], model: str, title: str = "VectorWeb Labs") -> str:
+    llm = get_async_client()
+    if not llm:
+        raise RuntimeError("OpenRouter API key not configured")
+    
+    completion = await llm.chat.completions.create(
+        extra_headers={**OPENROUTER_HEADERS, "X-Title": title},
+        model=model,
+        messages=messages
     )
     return completion.choices[0].message.content
 
 
-def generate_quote(business_data: dict) -> dict:
+async def _call_openrouter_async(system_prompt: str, user_prompt: str, task: str = "default") -> str:
     """
-    Generate an AI-powered price quote for a project.
+    Non-blocking variant of _call_openrouter for use inside async routes.
+    Runs on the shared pooled HTTP client so the event loop stays free.
+    The model is chosen (and hedged) by the model router for `task`.
     
-    Args:
-        business_data: Dictionary containing:
-            - business_name (str)
-            - website_type (str): e.g., "E-commerce", "Portfolio", "Landing Page"
-            - target_audience (str): Description of target users
-            - vibe_style (str): "modern", "classic", or "bold"
-            - project_scope (dict): Optional, containing pages/features
-    
-    Returns:
-        dict: {
-            "price": int,
-            "reasoning": str,
-            "features": list[str],
-            "risks": list[str],
-            "suggested_stack": str
-        }
+    Concurrent calls with the same (system_prompt, user_prompt, task) are
+    coalesced onto a single upstream request and all receive its result.
+    A cancelled caller leaves the shared request running for the others;
+    when the last caller is cancelled, the upstream request is cancelled too.
+    """
+    key = (system_prompt, user_prompt, task)
+    single_flight_stats["calls"] += 1
+
+    flight = _inflight.get(key)
+    if flight is not None:
+        single_flight_stats["coalesced"] += 1
+    else:
+        single_flight_stats["upstream"] += 1
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        flight = asyncio.create_task(model_router.run(task, lambda model: _request_completion(messages, model)))
+        _inflight[key] = flight
+
+        def _release(done: asyncio.Task) -> None:
+            if _inflight.get(key) is done:
+                del _inflight[key]
+            if not done.cancelled():
+                done.exception()  # mark retrieved even if every caller went away
+
+        flight.add_done_callback(_release)
+
+    _waiters[flight] = _waiters.get(flight, 0) + 1
+    try:
+        return await asyncio.shield(flight)
+    finally:
+        _waiters[flight] -= 1
+        if not _waiters[flight]:
+            del _waiters[flight]
+            if not flight.done():
+                # Nobody is left to use the result (e.g. a discarded prefetch)
+                single_flight_stats["cancelled"] += 1
+                flight.cancel()
+                if _inflight.get(key) is flight:
+                    del _inflight[key]  # new callers must not join a dying request
+
+
+async def chat_completion_async(messages: list[dict], task: str = "chat", title: str = "VectorWeb Labs") -> str:
+    """
+    Complete a full chat transcript on the router's model for `task`, with
+    hedging and failover. Not single-flighted: transcripts are per user.
+    """
+    return await model_router.run(task, lambda model: _request_completion(messages, model, title))
+
+
+async def _first_delta(chunks: AsyncIterator) -> Optional[str]:
+    async for chunk in chunks:
+        if chunk.choices and chunk.choices[0].delta.content:
+            return chunk.choices[0].delta.content
+    return None
+
+
+async def stream_openrouter(messages: list[dict], task: str = "chat", title: str = "VectorWeb Labs") -> AsyncIterator[str]:
+    """
+    Stream completion text deltas from OpenRouter as they arrive.
+    The router picks the model for `task`; if a stream fails before its
+    first delta, the next candidate is tried (streams are never hedged).
+    Closing the generator (e.g. when the client disconnects) closes the
+    upstream response so an abandoned generation stops using capacity.
+    """
+    llm = get_async_client()
+    if not llm:
+        raise RuntimeError("OpenRouter API key not configured")
+
+    last_error: Optional[Exception] = None
+    for model in model_router.candidates(task):
+        stream = None
+        try:
+            stream = await llm.chat.completions.create(
+                extra_headers={**OPENROUTER_HEADERS, "X-Title": title},
+                model=model,
+                messages=messages,
+                stream=True
+            )
+            chunks = stream.__aiter__()
+            first = await _first_delta(chunks)
+        except Exception as e:
+            # Time to first token isn't comparable with full completions, so only health is recorded
+            model_router.record(model, None, ok=False)
+            if stream is not None:
+                await stream.close()
+            last_error = e
+            continue
+        model_router.record(model, None, ok=True)
+        break
+    else:
+        raise last_error
+
+    try:
+        if first is not None:
+            yield first
+            async for chunk in chunks:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+    finally:
+        await stream.close()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# QUOTE GENERATION
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _mock_quote(business_data: dict) -> dict:
+    """Fallback response if no API key: the rule-engine quote."""
+    quote = pricing.provisional_quote(business_data)
+    quote["reasoning"] = f"[MOCK] {quote['reasoning']}"
+    return quote
+
+
+def _build_quote_prompt(business_data: dict, price: int) -> str:
+    """
+    Build the Scout user prompt from project/business data.
+    The price is computed by the pricing engine; Scout only explains it.
     """
-    if not client:
-        # Fallback mock response if no API key
-        return {
-            "price": 1200,
-            "reasoning": "[MOCK] Estimated based on standard portfolio site with 5 pages.",
-            "features": ["Responsive Design", "Contact Form", "SEO Optimization"],
-            "risks": [],
-            "suggested_stack": "Next.js + Tailwind CSS + Supabase"
-        }
-    
     # Prioritize project_scope if explicit, otherwise use wizard_data discovery history
     scope_content = "Standard 5-page website"
     
@@ -139,21 +318,37 @@ def generate_quote(business_data: dict) -> dict:
         formatted_history = "\n".join([f"Q: {item['q']}\nA: {item['a']}" for item in history])
         scope_content = f"Discovery Interview Results:\n{formatted_history}"
 
-    # Build user prompt from business data
-    user_prompt = f"""Generate a price quote for this project:
+    return f"""Generate a price quote for this project:
 
 Business Name: {business_data.get('business_name', 'Unknown')}
 Website Type: {business_data.get('website_type', 'Portfolio')}
 Target Audience: {business_data.get('target_audience', 'General')}
 Design Style: {business_data.get('vibe_style', 'modern')}
 Scope: {scope_content}
+Price: ${price} (already calculated from the pricing logic - use it as-is)
 
 Return ONLY a valid JSON object with: price, reasoning, features, risks, suggested_stack."""
 
+
+def _quote_error_fallback(e: Exception) -> dict:
+    print(f"AI quote generation error: {e}")
+    return {
+        "price": 1000,
+        "reasoning": f"Error: {str(e)}",
+        "features": [],
+        "risks": ["AI service error"],
+        "suggested_stack": "Next.js"
+    }
+
+
+def _parse_quote_response(response: str) -> tuple[dict, bool]:
+    """
+    Parse the raw LLM output into a quote dict, falling back on bad JSON.
+    Returns (quote, ok); ok is False when a fallback quote was substituted.
+    """
     try:
-        response = _call_openrouter(SCOUT_SYSTEM_PROMPT, user_prompt)
         cleaned = _strip_markdown_json(response)
-        return json.loads(cleaned)
+        return json.loads(cleaned), True
     except json.JSONDecodeError as e:
         print(f"Failed to parse AI response as JSON: {e}")
         print(f"Raw response: {response}")
@@ -164,16 +359,120 @@ Return ONLY a valid JSON object with: price, reasoning, features, risks, suggest
             "features": ["Basic Website"],
             "risks": ["AI quote generation failed"],
             "suggested_stack": "Next.js + Tailwind CSS"
-        }
+        }, False
     except Exception as e:
-        print(f"AI quote generation error: {e}")
-        return {
-            "price": 1000,
-            "reasoning": f"Error: {str(e)}",
-            "features": [],
-            "risks": ["AI service error"],
-            "suggested_stack": "Next.js"
+        return _quote_error_fallback(e), False
+
+
+def generate_quote(business_data: dict) -> dict:
+    """
+    Generate an AI-powered price quote for a project.
+    
+    Args:
+        business_data: Dictionary containing:
+            - business_name (str)
+            - website_type (str): e.g., "E-commerce", "Portfolio", "Landing Page"
+            - target_audience (str): Description of target users
+            - vibe_style (str): "modern", "classic", or "bold"
+            - project_scope (dict): Optional, containing pages/features
+    
+    Returns:
+        dict: {
+            "price": int,
+            "reasoning": str,
+            "features": list[str],
+            "risks": list[str],
+            "suggested_stack": str
         }
+    """
+    if not client:
+        return _mock_quote(business_data)
+
+    price = pricing.estimate(business_data)["price"]
+    user_prompt = _build_quote_prompt(business_data, price)
+
+    try:
+        response = _call_openrouter(SCOUT_SYSTEM_PROMPT, user_prompt, task="quote")
+    except Exception as e:
+        return {**_quote_error_fallback(e), "price": price}
+    return {**_parse_quote_response(response)[0], "price": price}
+
+
+# Changes whenever the Scout prompt or pricing rules do, so stale cached quotes are never served
+QUOTE_CACHE_NAMESPACE = hashlib.sha256(
+    (SCOUT_SYSTEM_PROMPT + pricing.RULES_VERSION).encode()
+).hexdigest()[:16]
+
+
+async def generate_quote_async(business_data: dict, force_refresh: bool = False) -> dict:
+    """
+    Async version of generate_quote. Same inputs, same return shape.
+    
+    Quotes are cached by a hash of the normalized prompt inputs, so an
+    unchanged project is not re-quoted. `force_refresh` skips the lookup
+    (the fresh result still replaces the cached one).
+
+    The price always comes from the pricing engine; the LLM only writes the
+    narrative fields, and a failed call still returns the computed price.
+    """
+    if not get_async_client():
+        return _mock_quote(business_data)
+
+    # Pricing reads more than the prompt's scope (discovery answers next to an
+    # explicit project_scope), so the estimate is part of the key
+    estimate = pricing.estimate(business_data)
+    price = estimate["price"]
+    key = cache_key({**normalize_quote_inputs(business_data), "estimate": estimate}, QUOTE_CACHE_NAMESPACE)
+    if not force_refresh:
+        cached = await quote_cache.get(key)
+        if cached is not None:
+            return {**cached, "price": price}
+
+    user_prompt = _build_quote_prompt(business_data, price)
+
+    try:
+        response = await _call_openrouter_async(SCOUT_SYSTEM_PROMPT, user_prompt, task="quote")
+    except Exception as e:
+        return {**_quote_error_fallback(e), "price": price}
+
+    quote, ok = _parse_quote_response(response)
+    quote["price"] = price
+    if ok:
+        await quote_cache.set(key, quote)
+    return quote
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DOMAIN IDEAS
+# ══════════════════════════════════════════════════════════════════════════════
+
+DOMAIN_SYSTEM_PROMPT = "You are a domain name expert. Return ONLY valid JSON arrays with no markdown formatting."
+
+
+def fallback_domain_ideas(domain: str) -> list[str]:
+    """Deterministic suggestions used in mock mode or when the LLM fails."""
+    base = domain.replace(".com", "").replace(".io", "").replace(".co", "")
+    return [
+        f"{base}.io",
+        f"{base}lab.co",
+        f"get{base}.com"
+    ]
+
+
+def _build_domain_prompt(domain: str, vibe: str, count: int = 3) -> str:
+    return f"""The domain '{domain}' is taken. The brand vibe is '{vibe}'. 
+Suggest {count} available, creative alternatives (e.g., with .io, .co, .lab, .dev, .app).
+Return ONLY a JSON list of strings, no other text."""
+
+
+def _parse_domain_ideas(response: str, count: int = 3) -> list[str]:
+    cleaned = _strip_markdown_json(response)
+    suggestions = json.loads(cleaned)
+    
+    # Ensure we return a list
+    if isinstance(suggestions, list):
+        return suggestions[:max(count, 5)]  # Limit to 5 suggestions (or `count` if larger)
+    return []
 
 
 def generate_domain_ideas(domain: str, vibe: str) -> list[str]:
@@ -188,62 +487,123 @@ def generate_domain_ideas(domain: str, vibe: str) -> list[str]:
         list[str]: List of 3 alternative domain suggestions
     """
     if not client:
-        # Fallback mock suggestions
-        base = domain.replace(".com", "").replace(".io", "").replace(".co", "")
-        return [
-            f"{base}.io",
-            f"{base}lab.co",
-            f"get{base}.com"
-        ]
-    
-    user_prompt = f"""The domain '{domain}' is taken. The brand vibe is '{vibe}'. 
-Suggest 3 available, creative alternatives (e.g., with .io, .co, .lab, .dev, .app).
-Return ONLY a JSON list of strings, no other text."""
+        return fallback_domain_ideas(domain)
 
     try:
-        response = _call_openrouter(
-            "You are a domain name expert. Return ONLY valid JSON arrays with no markdown formatting.",
-            user_prompt
-        )
-        cleaned = _strip_markdown_json(response)
-        suggestions = json.loads(cleaned)
-        
-        # Ensure we return a list
-        if isinstance(suggestions, list):
-            return suggestions[:5]  # Limit to 5 suggestions
-        return []
+        response = _call_openrouter(DOMAIN_SYSTEM_PROMPT, _build_domain_prompt(domain, vibe), task="domain_ideas")
+        return _parse_domain_ideas(response)
     except Exception as e:
         print(f"Domain idea generation error: {e}")
-        # Fallback suggestions
-        base = domain.replace(".com", "").replace(".io", "").replace(".co", "")
-        return [
-            f"{base}.io",
-            f"{base}lab.co",
-            f"get{base}.com"
-        ]
+        return fallback_domain_ideas(domain)
 
 
-def generate_discovery_question(business_name: str, industry: str, current_q_index: int, previous_answers: list[dict]) -> dict:
+async def generate_domain_ideas_async(domain: str, vibe: str, count: int = 3) -> list[str]:
     """
-    Generate a technical discovery question using a Phase-Based Funnel.
+    Async version of generate_domain_ideas. `count` asks the LLM for more
+    candidates (used when suggestions are pre-filtered by availability).
+    """
+    if not get_async_client():
+        return fallback_domain_ideas(domain)
+
+    try:
+        response = await _call_openrouter_async(DOMAIN_SYSTEM_PROMPT, _build_domain_prompt(domain, vibe, count), task="domain_ideas")
+        return _parse_domain_ideas(response, count)
+    except Exception as e:
+        print(f"Domain idea generation error: {e}")
+        return fallback_domain_ideas(domain)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DISCOVERY QUESTIONS
+# ══════════════════════════════════════════════════════════════════════════════
+
+DISCOVERY_COMPLETE = {
+    "question": "",
+    "options": [],
+    "allow_multiple": False,
+    "is_complete": True
+}
+
+DISCOVERY_FALLBACK = {
+    "question": "What is your estimated timeline for launch?",
+    "options": ["ASAP (1-2 weeks)", "Standard (4-6 weeks)", "Flexible (2-3 months)", "No strict deadline"],
+    "allow_multiple": False,
+    "is_complete": False
+}
+
+# Progressive mock questions to simulate a real flow without looping
+MOCK_DISCOVERY_QUESTIONS = [
+    {
+        "question": "What are the main goals of your new website?",
+        "options": ["Get more local customers", "Sell products online", "Showcase portfolio", "Book appointments"],
+        "allow_multiple": True
+    },
+    {
+        "question": "How many customers do you serve weekly?",
+        "options": ["Just starting out", "1-50 customers", "50-500 customers", "500+ (High volume)"],
+        "allow_multiple": False
+    },
+    {
+        "question": "Do you have existing branding assets?",
+        "options": ["Yes, full brand guide", "Just a logo", "Starting from scratch", "Need a refresh"],
+        "allow_multiple": False
+    },
+    {
+        "question": "What features are essential for launch?",
+        "options": ["Contact Form", "Live Chat", "Blog / News", "Photo Gallery", "User Login"],
+        "allow_multiple": True
+    },
+    {
+        "question": "What is your approximate budget range?",
+        "options": ["$500 - $1,000", "$1,000 - $2,500", "$2,500 - $5,000", "$5,000+"],
+        "allow_multiple": False
+    },
+    {
+        "question": "When are you looking to launch?",
+        "options": ["ASAP (1-2 weeks)", "Standard (4-6 weeks)", "Flexible timeline", "No rush"],
+        "allow_multiple": False
+    },
+    {
+        "question": "Who will handle ongoing content updates?",
+        "options": ["I will (Need CMS)", "My team", "I need a maintenance plan", "Not sure yet"],
+        "allow_multiple": False
+    },
+    {
+        "question": "Do you need integration with other tools?",
+        "options": ["CRM (Salesforce/HubSpot)", "Email Marketing", "Booking System", "Payment Gateway", "None"],
+        "allow_multiple": True
+    },
+    {
+        "question": "What describes your ideal aesthetic?",
+        "options": ["Clean & Minimalist", "Bold & Colorful", "Corporate & Professional", "Warm & Welcoming"],
+        "allow_multiple": False
+    },
+    {
+        "question": "Final Confirmation: Ready for your quote?",
+        "options": ["Yes, show me the numbers", "Review answers first"],
+        "allow_multiple": False
+    }
+]
+
+
+def _mock_discovery_question(current_q_index: int) -> dict:
+    """Fallbacks for offline/no-key mode."""
+    # Return question based on index, defaulting to completion if out of bounds
+    if current_q_index < len(MOCK_DISCOVERY_QUESTIONS):
+        return dict(MOCK_DISCOVERY_QUESTIONS[current_q_index])
+    return dict(DISCOVERY_COMPLETE)
+
+
+def _build_discovery_prompts(business_name: str, industry: str, current_q_index: int, previous_answers: list[dict]) -> tuple[str, str]:
+    """
+    Build the (system_prompt, user_prompt) pair for a discovery question.
     
     Phases:
     1. Identity & Goals (Index 0-2)
     2. Features & Mechanics (Index 3-6)
     3. Logistics & Constraints (Index 7-9)
     """
-    
-    # 1. THE FINISH LINE
-    # If we've reached 10 questions, forcing completion.
-    if current_q_index >= 10:
-        return {
-            "question": "",
-            "options": [],
-            "allow_multiple": False,
-            "is_complete": True
-        }
-
-    # 2. Extract topics to avoid loops
+    # Extract topics to avoid loops
     topics_covered = []
     for item in previous_answers:
         q_text = item.get('q', '').lower()
@@ -268,73 +628,6 @@ def generate_discovery_question(business_name: str, industry: str, current_q_ind
         phase = "PHASE 3: LOGISTICS & CONSTRAINTS"
         phase_instruction = "Focus on execution: Timeline, Content Readiness (logos/text), Budget range, or Maintenance needs."
 
-    if not client:
-        # Fallbacks for offline/no-key mode
-        # Progressive mock questions to simulate a real flow without looping
-        mock_questions = [
-            {
-                "question": "What are the main goals of your new website?",
-                "options": ["Get more local customers", "Sell products online", "Showcase portfolio", "Book appointments"],
-                "allow_multiple": True
-            },
-            {
-                "question": "How many customers do you serve weekly?",
-                "options": ["Just starting out", "1-50 customers", "50-500 customers", "500+ (High volume)"],
-                "allow_multiple": False
-            },
-            {
-                "question": "Do you have existing branding assets?",
-                "options": ["Yes, full brand guide", "Just a logo", "Starting from scratch", "Need a refresh"],
-                "allow_multiple": False
-            },
-            {
-                "question": "What features are essential for launch?",
-                "options": ["Contact Form", "Live Chat", "Blog / News", "Photo Gallery", "User Login"],
-                "allow_multiple": True
-            },
-            {
-                "question": "What is your approximate budget range?",
-                "options": ["$500 - $1,000", "$1,000 - $2,500", "$2,500 - $5,000", "$5,000+"],
-                "allow_multiple": False
-            },
-            {
-                "question": "When are you looking to launch?",
-                "options": ["ASAP (1-2 weeks)", "Standard (4-6 weeks)", "Flexible timeline", "No rush"],
-                "allow_multiple": False
-            },
-            {
-                "question": "Who will handle ongoing content updates?",
-                "options": ["I will (Need CMS)", "My team", "I need a maintenance plan", "Not sure yet"],
-                "allow_multiple": False
-            },
-            {
-                "question": "Do you need integration with other tools?",
-                "options": ["CRM (Salesforce/HubSpot)", "Email Marketing", "Booking System", "Payment Gateway", "None"],
-                "allow_multiple": True
-            },
-            {
-                "question": "What describes your ideal aesthetic?",
-                "options": ["Clean & Minimalist", "Bold & Colorful", "Corporate & Professional", "Warm & Welcoming"],
-                "allow_multiple": False
-            },
-            {
-                "question": "Final Confirmation: Ready for your quote?",
-                "options": ["Yes, show me the numbers", "Review answers first"],
-                "allow_multiple": False
-            }
-        ]
-        
-        # Return question based on index, defaulting to the last one if out of bounds
-        if current_q_index < len(mock_questions):
-            return mock_questions[current_q_index]
-        else:
-             return {
-                "question": "",
-                "options": [],
-                "allow_multiple": False,
-                "is_complete": True
-            }
-
     system_prompt = f"""Role: You are a friendly, non-technical Web Agency Consultant. 
 Your client is a small business owner.
     
@@ -371,23 +664,90 @@ Previous Answers: {json.dumps(previous_answers, indent=2)}
 Task: Generate question #{current_q_index + 1} for {phase}.
 JSON Response:"""
 
-    try:
-        response = _call_openrouter(system_prompt, user_prompt)
-        cleaned = _strip_markdown_json(response)
-        data = json.loads(cleaned)
-        
-        # Ensure is_complete is present
-        if "is_complete" not in data:
-            data["is_complete"] = False
-            
-        return data
+    return system_prompt, user_prompt
+
+
+def _parse_discovery_response(response: str) -> dict:
+    cleaned = _strip_markdown_json(response)
+    data = json.loads(cleaned)
+    
+    # Ensure is_complete is present
+    if "is_complete" not in data:
+        data["is_complete"] = False
         
+    return data
+
+
+def generate_discovery_question(business_name: str, industry: str, current_q_index: int, previous_answers: list[dict]) -> dict:
+    """
+    Generate a technical discovery question using a Phase-Based Funnel.
+    
+    Phases:
+    1. Identity & Goals (Index 0-2)
+    2. Features & Mechanics (Index 3-6)
+    3. Logistics & Constraints (Index 7-9)
+    """
+    
+    # THE FINISH LINE
+    # If we've reached 10 questions, forcing completion.
+    if current_q_index >= 10:
+        return dict(DISCOVERY_COMPLETE)
+
+    if not client:
+        return _mock_discovery_question(current_q_index)
+
+    system_prompt, user_prompt = _build_discovery_prompts(business_name, industry, current_q_index, previous_answers)
+
+    try:
+        response = _call_openrouter(system_prompt, user_prompt, task="discovery")
+        return _parse_discovery_response(response)
     except Exception as e:
         print(f"Discovery question generation error: {e}")
-        return {
-            "question": "What is your estimated timeline for launch?",
-            "options": ["ASAP (1-2 weeks)", "Standard (4-6 weeks)", "Flexible (2-3 months)", "No strict deadline"],
-            "allow_multiple": False,
-            "is_complete": False
-        }
+        return dict(DISCOVERY_FALLBACK)
+
+
+async def generate_discovery_question_async(business_name: str, industry: str, current_q_index: int, previous_answers: list[dict]) -> dict:
+    """
+    Async version of generate_discovery_question.
+    """
+    if current_q_index >= 10:
+        return dict(DISCOVERY_COMPLETE)
+
+    if not get_async_client():
+        return _mock_discovery_question(current_q_index)
+
+    cached = discovery_cache.get(industry, current_q_index, previous_answers)
+    if cached is not None:
+        return cached
+
+    system_prompt, user_prompt = _build_discovery_prompts(business_name, industry, current_q_index, previous_answers)
 
+    try:
+        response = await _call_openrouter_async(system_prompt, user_prompt, task="discovery")
+        data = _parse_discovery_response(response)
+    except Exception as e:
+        print(f"Discovery question generation error: {e}")
+        return dict(DISCOVERY_FALLBACK)
+
+    # Questions are shared across clients, so never cache one that names this client
+    if not names_client(business_name, data):
+        discovery_cache.put(industry, current_q_index, previous_answers, data)
+    return data
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CONVERSATION SUMMARIES
+# ══════════════════════════════════════════════════════════════════════════════
+
+SUMMARY_SYSTEM_PROMPT = """Summarize this support conversation between a user and VectorBot for use as context in later turns.
+Keep facts the user shared (business, goals, budget, decisions) and open questions. Plain text, at most 120 words."""
+
+
+async def summarize_conversation_async(transcript: str, previous_summary: Optional[str] = None) -> str:
+    """
+    Summarize chat turns (one "role: content" line each), folding them into
+    `previous_summary` when given. Raises if the call fails.
+    """
+    prompt = f"Earlier summary:\n{previous_summary}\n\nNew turns:\n{transcript}" if previous_summary else transcript
+    response = await _call_openrouter_async(SUMMARY_SYSTEM_PROMPT, prompt, task="chat")
+    return response.strip()
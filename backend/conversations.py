@@ -0,0 +1,215 @@
+"""
+VectorWeb Labs - VectorBot Conversation Store
+Server-side chat history keyed by conversation id, so clients send only the
+id and the new message. In-memory LRU with TTL in front of an optional
+persistent backend (SQLite file or the Postgres `vectorbot_conversations`
+table, migration 0008).
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Optional
+
+import db_async
+
+VECTORBOT_STORE_BACKEND = os.getenv("VECTORBOT_STORE_BACKEND", "memory")  # memory | sqlite | postgres
+VECTORBOT_STORE_PATH = os.getenv("VECTORBOT_STORE_PATH", "vectorbot_conversations.sqlite3")
+VECTORBOT_STORE_SIZE = int(os.getenv("VECTORBOT_STORE_SIZE", "2000"))
+VECTORBOT_STORE_TTL = float(os.getenv("VECTORBOT_STORE_TTL", str(24 * 3600)))
+# Compaction: past this many messages the oldest quarter is dropped
+VECTORBOT_HISTORY_MAX_MESSAGES = int(os.getenv("VECTORBOT_HISTORY_MAX_MESSAGES", "100"))
+VECTORBOT_HISTORY_KEEP_MESSAGES = VECTORBOT_HISTORY_MAX_MESSAGES * 3 // 4
+
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _compact(messages: list[dict]) -> list[dict]:
+    if len(messages) <= VECTORBOT_HISTORY_MAX_MESSAGES:
+        return messages
+    # Drop in chunks so the retained prefix (and its rolling summary) stays stable for a while
+    return messages[-VECTORBOT_HISTORY_KEEP_MESSAGES:]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BACKENDS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class SQLiteBackend:
+    """Single-file backend that survives restarts. Queries run in a worker thread."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectorbot_conversations "
+                "(id TEXT PRIMARY KEY, messages TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _load(self, conversation_id: str) -> Optional[list[dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages, expires_at FROM vectorbot_conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        if not row or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def _append(self, conversation_id: str, messages: list[dict], seed: list[dict], ttl: float) -> list[dict]:
+        with self._lock:
+            # Read and write in one write transaction, so other processes can't interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT messages FROM vectorbot_conversations WHERE id = ? AND expires_at > ?",
+                    (conversation_id, time.time()),
+                ).fetchone()
+                stored = _compact((json.loads(row[0]) if row else seed) + messages)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO vectorbot_conversations (id, messages, expires_at) VALUES (?, ?, ?)",
+                    (conversation_id, json.dumps(stored), time.time() + ttl),
+                )
+                self._conn.execute("DELETE FROM vectorbot_conversations WHERE expires_at <= ?", (time.time(),))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return stored
+
+    async def load(self, conversation_id: str) -> Optional[list[dict]]:
+        return await asyncio.to_thread(self._load, conversation_id)
+
+    async def append(self, conversation_id: str, messages: list[dict], seed: list[dict], ttl: float) -> list[dict]:
+        return await asyncio.to_thread(self._append, conversation_id, messages, seed, ttl)
+
+
+class PostgresBackend:
+    """Shared backend for multi-worker deployments, over the PostgREST pool."""
+
+    TABLE = "vectorbot_conversations"
+
+    async def load(self, conversation_id: str) -> Optional[list[dict]]:
+        rows = await db_async._request("GET", self.TABLE, params={
+            "select": "messages",
+            "id": f"eq.{conversation_id}",
+            "expires_at": f"gt.{datetime.now(timezone.utc).isoformat()}",
+            "limit": "1",
+        })
+        return rows[0]["messages"] if rows else None
+
+    async def append(self, conversation_id: str, messages: list[dict], seed: list[dict], ttl: float) -> list[dict]:
+        # One statement under the row lock (migration 0010), so concurrent turns both land
+        return await db_async._request("POST", "rpc/append_vectorbot_messages", json={
+            "p_id": conversation_id,
+            "p_messages": messages,
+            "p_seed": seed,
+            "p_expires_at": datetime.fromtimestamp(time.time() + ttl, timezone.utc).isoformat(),
+            "p_max_messages": VECTORBOT_HISTORY_MAX_MESSAGES,
+            "p_keep_messages": VECTORBOT_HISTORY_KEEP_MESSAGES,
+        })
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# STORE
+# ══════════════════════════════════════════════════════════════════════════════
+
+class ConversationStore:
+    """
+    LRU of conversations with per-entry TTL, read-through / write-through to
+    the optional backend. Backend errors are logged and the memory copy used.
+    """
+
+    def __init__(self, backend=None, max_size: int = VECTORBOT_STORE_SIZE, ttl: float = VECTORBOT_STORE_TTL):
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, list[dict]]]" = OrderedDict()
+        self._appending: dict[str, asyncio.Lock] = {}
+        self._appenders: dict[str, int] = {}  # callers holding or awaiting each lock
+
+    @classmethod
+    def from_env(cls) -> "ConversationStore":
+        if VECTORBOT_STORE_BACKEND == "sqlite":
+            return cls(SQLiteBackend(VECTORBOT_STORE_PATH))
+        if VECTORBOT_STORE_BACKEND == "postgres":
+            return cls(PostgresBackend())
+        return cls()
+
+    def _remember(self, conversation_id: str, messages: list[dict]) -> None:
+        self._entries[conversation_id] = (time.time() + self.ttl, messages)
+        self._entries.move_to_end(conversation_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, conversation_id: str) -> Optional[list[dict]]:
+        """The conversation's history, or None if unknown or expired."""
+        entry = self._entries.get(conversation_id)
+        if entry:
+            expires_at, messages = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(conversation_id)
+                return list(messages)
+            del self._entries[conversation_id]
+        if self.backend is None:
+            return None
+        try:
+            messages = await self.backend.load(conversation_id)
+        except Exception as e:
+            print(f"Conversation store read error ({type(self.backend).__name__}): {e}")
+            return None
+        if messages is not None:
+            self._remember(conversation_id, messages)
+            return list(messages)
+        return None
+
+    def _cached(self, conversation_id: str) -> Optional[list[dict]]:
+        entry = self._entries.get(conversation_id)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        return None
+
+    async def append(self, conversation_id: str, messages: list[dict], seed: Optional[list[dict]] = None) -> list[dict]:
+        """
+        Append `messages` to the stored history (compacted) and return what
+        was stored. Concurrent appends to one conversation all land, in some
+        order. `seed` is the history to start from if the conversation is
+        unknown or expired.
+        """
+        seed = seed or []
+        lock = self._appending.setdefault(conversation_id, asyncio.Lock())
+        self._appenders[conversation_id] = self._appenders.get(conversation_id, 0) + 1
+        try:
+            # Serialized per conversation so the memory copy ends as the last write left it
+            async with lock:
+                if self.backend is not None:
+                    try:
+                        stored = await self.backend.append(conversation_id, messages, seed, self.ttl)
+                        self._remember(conversation_id, stored)
+                        return list(stored)
+                    except Exception as e:
+                        print(f"Conversation store write error ({type(self.backend).__name__}): {e}")
+                current = self._cached(conversation_id)
+                stored = _compact((current if current is not None else seed) + messages)
+                self._remember(conversation_id, stored)
+                return list(stored)
+        finally:
+            self._appenders[conversation_id] -= 1
+            if not self._appenders[conversation_id]:
+                del self._appenders[conversation_id]
+                del self._appending[conversation_id]
+
+    def stats(self) -> dict:
+        return {"conversations": len(self._entries), "backend": type(self.backend).__name__ if self.backend else None}
+
+
+conversation_store = ConversationStore.from_env()
@@ -22,6 +22,36 @@ if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
 
+def build_project_row(data: dict) -> dict:
+    """
+    Build the row inserted for a new project from user-supplied data.
+    Shared by the sync and async data layers.
+    """
+    # Build project data with required fields
+    project_data = {
+        "business_name": data.get("business_name"),
+        "vibe_style": data.get("vibe_style"),
+        "user_id": data.get("user_id"),
+        "domain_choice": data.get("domain_choice"),
+        "status": "draft",
+        "deposit_paid": False,
+    }
+    
+    # Add optional fields if provided
+    if data.get("client_phone"):
+        project_data["client_phone"] = data["client_phone"]
+    if data.get("website_type"):
+        project_data["website_type"] = data["website_type"]
+    if data.get("target_audience"):
+        project_data["target_audience"] = data["target_audience"]
+    if data.get("project_scope"):
+        project_data["project_scope"] = data["project_scope"]
+    if data.get("wizard_data"):
+        project_data["wizard_data"] = data["wizard_data"]
+    
+    return project_data
+
+
 def create_project(data: dict) -> str:
     """
     Create a new project in the database.
@@ -44,27 +74,7 @@ def create_project(data: dict) -> str:
         HTTPException: 500 error if database operation fails
     """
     try:
-        # Build project data with required fields
-        project_data = {
-            "business_name": data.get("business_name"),
-            "vibe_style": data.get("vibe_style"),
-            "user_id": data.get("user_id"),
-            "domain_choice": data.get("domain_choice"),
-            "status": "draft",
-            "deposit_paid": False,
-        }
-        
-        # Add optional fields if provided
-        if data.get("client_phone"):
-            project_data["client_phone"] = data["client_phone"]
-        if data.get("website_type"):
-            project_data["website_type"] = data["website_type"]
-        if data.get("target_audience"):
-            project_data["target_audience"] = data["target_audience"]
-        if data.get("project_scope"):
-            project_data["project_scope"] = data["project_scope"]
-        if data.get("wizard_data"):
-            project_data["wizard_data"] = data["wizard_data"]
+        project_data = build_project_row(data)
         
         # Insert into Supabase
         result = supabase.table("projects").insert(project_data).execute()
@@ -0,0 +1,594 @@
+"""
+VectorWeb Labs - Async Database Service
+Non-blocking counterpart to db.py for use inside async FastAPI handlers.
+Talks to Supabase's PostgREST API over a pooled, keep-alive httpx client.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from datetime import datetime, timezone
+from typing import Optional, Any, Iterator
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from db import build_project_row
+
+# Load environment variables
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+    raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY environment variables")
+
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_KEEPALIVE = int(os.getenv("DB_MAX_KEEPALIVE", "10"))
+DB_KEEPALIVE_EXPIRY = float(os.getenv("DB_KEEPALIVE_EXPIRY", "30"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+
+# Dashboard listing: everything except the heavy JSONB blobs
+# (wizard_data, project_scope, discovery_notes, AI quote fields)
+PROJECT_SUMMARY_COLUMNS = (
+    "id", "user_id", "business_name", "vibe_style", "domain_choice", "status",
+    "website_type", "deposit_paid", "wizard_step", "created_at",
+)
+
+# Project row cache: per-request (contextvar) plus a short process-wide TTL
+PROJECT_CACHE_TTL = float(os.getenv("PROJECT_CACHE_TTL", "5"))  # 0 disables the process cache
+PROJECT_CACHE_SIZE = int(os.getenv("PROJECT_CACHE_SIZE", "1000"))
+
+_client: Optional[httpx.AsyncClient] = None
+_project_cache: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+
+class _RequestCache(dict):
+    """Project rows cached for one request; unusable once the request ends."""
+    active = True
+
+
+_request_projects: ContextVar[Optional[_RequestCache]] = ContextVar("request_projects", default=None)
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared PostgREST client, creating it on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": SUPABASE_SERVICE_KEY,
+                "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+            },
+            limits=httpx.Limits(
+                max_connections=DB_POOL_SIZE,
+                max_keepalive_connections=DB_MAX_KEEPALIVE,
+                keepalive_expiry=DB_KEEPALIVE_EXPIRY,
+            ),
+            timeout=DB_TIMEOUT,
+        )
+    return _client
+
+
+async def close() -> None:
+    """
+    Close the connection pool. Called from the app lifespan on shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@contextmanager
+def request_scope() -> Iterator[None]:
+    """
+    Give the current request its own project cache, so repeated reads of a
+    project within one request never leave the process. Entered by the app
+    middleware.
+
+    Tasks and callbacks created during the request copy this context; the
+    cache is deactivated on exit so they can't keep reading its rows.
+    """
+    scope = _RequestCache()
+    token = _request_projects.set(scope)
+    try:
+        yield
+    finally:
+        scope.active = False
+        scope.clear()
+        _request_projects.reset(token)
+
+
+def background_context() -> Context:
+    """
+    A copy of the current context with no request cache, for long-lived
+    background work (queue workers, retry timers, deferred flushes) that may
+    be started from inside a request. Pass it as `context=` to create_task
+    or call_later.
+    """
+    context = copy_context()
+    context.run(_request_projects.set, None)
+    return context
+
+
+def _request_cache() -> Optional[_RequestCache]:
+    scope = _request_projects.get()
+    return scope if scope is not None and scope.active else None
+
+
+def _cached_project(project_id: str) -> Optional[dict]:
+    scoped = _request_cache()
+    if scoped is not None and project_id in scoped:
+        return scoped[project_id]
+    hit = _project_cache.get(project_id)
+    if hit is None:
+        return None
+    expires_at, row = hit
+    if expires_at <= time.monotonic():
+        del _project_cache[project_id]
+        return None
+    _project_cache.move_to_end(project_id)
+    if scoped is not None:
+        scoped[project_id] = row
+    return row
+
+
+def _cache_project(row: dict) -> None:
+    """Store a fresh row (from a read or an update's returned representation)."""
+    project_id = str(row.get("id"))
+    scoped = _request_cache()
+    if scoped is not None:
+        scoped[project_id] = row
+    if PROJECT_CACHE_TTL > 0:
+        _project_cache[project_id] = (time.monotonic() + PROJECT_CACHE_TTL, row)
+        _project_cache.move_to_end(project_id)
+        while len(_project_cache) > PROJECT_CACHE_SIZE:
+            _project_cache.popitem(last=False)
+
+
+def invalidate_project(project_id: str) -> None:
+    """Drop a project from both cache levels."""
+    _project_cache.pop(project_id, None)
+    scoped = _request_cache()
+    if scoped is not None:
+        scoped.pop(project_id, None)
+
+
+async def _request(
+    method: str,
+    table: str,
+    params: Optional[dict] = None,
+    json: Any = None,
+    prefer: Optional[str] = None,
+) -> list[dict]:
+    """
+    Perform a PostgREST request and return the decoded rows.
+    """
+    headers = {"Prefer": prefer} if prefer else None
+    response = await get_client().request(method, f"/{table}", params=params, json=json, headers=headers)
+    if response.is_error:
+        raise httpx.HTTPStatusError(
+            f"{response.status_code} {response.text}",
+            request=response.request,
+            response=response,
+        )
+    if not response.content:
+        return []
+    return response.json()
+
+
+async def ping() -> None:
+    """
+    Run a trivial query to verify database connectivity.
+    """
+    await _request("GET", "projects", params={"select": "id", "limit": "1"})
+
+
+async def create_project(data: dict) -> str:
+    """
+    Create a new project in the database.
+
+    Args:
+        data: Dictionary of project fields (see db.create_project)
+
+    Returns:
+        str: The newly created project ID
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    try:
+        rows = await _request(
+            "POST", "projects",
+            json=build_project_row(data),
+            prefer="return=representation",
+        )
+
+        if not rows:
+            print("Error: Supabase insert returned no data")
+            raise HTTPException(status_code=500, detail="Failed to create project - no data returned")
+
+        return str(rows[0].get("id"))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Database error in create_project: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def get_project(project_id: str) -> Optional[dict]:
+    """
+    Fetch a single project by ID (read-through cached, see request_scope).
+
+    Args:
+        project_id: The UUID of the project
+
+    Returns:
+        dict: The project data or None if not found
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    cached = _cached_project(project_id)
+    if cached is not None:
+        return dict(cached)
+    try:
+        rows = await _request("GET", "projects", params={
+            "select": "*",
+            "id": f"eq.{project_id}",
+            "limit": "1",
+        })
+        if not rows:
+            return None
+        _cache_project(rows[0])
+        return dict(rows[0])
+    except Exception as e:
+        print(f"Database error in get_project: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def get_projects_by_user(
+    user_id: str,
+    columns: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[tuple[str, str]] = None,
+) -> list[dict]:
+    """
+    Fetch a user's projects, newest first, one keyset page at a time.
+    Served by the (user_id, created_at desc, id desc) index (migration 0005).
+
+    Args:
+        user_id: The UUID of the user
+        columns: Columns to select (default: all)
+        limit: Page size (default: no limit)
+        cursor: (created_at, id) of the last row of the previous page
+
+    Returns:
+        list: List of project dictionaries
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    params = {
+        "select": ",".join(columns) if columns else "*",
+        "user_id": f"eq.{user_id}",
+        "order": "created_at.desc,id.desc",
+    }
+    if limit:
+        params["limit"] = str(limit)
+    if cursor:
+        created_at, last_id = cursor
+        params["or"] = f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{last_id}))'
+    try:
+        return await _request("GET", "projects", params=params)
+    except Exception as e:
+        print(f"Database error in get_projects_by_user: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def get_projects_by_ids(project_ids: list[str]) -> list[dict]:
+    """
+    Fetch several projects in one round trip.
+
+    Args:
+        project_ids: UUIDs of the projects
+
+    Returns:
+        list: The projects that exist (order not guaranteed)
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    if not project_ids:
+        return []
+    try:
+        return await _request("GET", "projects", params={
+            "select": "*",
+            "id": f"in.({','.join(project_ids)})",
+        })
+    except Exception as e:
+        print(f"Database error in get_projects_by_ids: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def update_project(project_id: str, data: dict) -> dict:
+    """
+    Update a project with the given data.
+
+    Args:
+        project_id: The UUID of the project
+        data: Dictionary of fields to update
+
+    Returns:
+        dict: The updated project data
+
+    Raises:
+        HTTPException: 404 if the project does not exist, 500 on database errors
+    """
+    try:
+        rows = await _request(
+            "PATCH", "projects",
+            params={"id": f"eq.{project_id}"},
+            json=data,
+            prefer="return=representation",
+        )
+
+        if not rows:
+            invalidate_project(project_id)
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        _cache_project(rows[0])
+        return dict(rows[0])
+    except HTTPException:
+        raise
+    except Exception as e:
+        invalidate_project(project_id)
+        print(f"Database error in update_project: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def _owned_rpc(function: str, args: dict) -> dict:
+    """
+    Call one of the owner-scoped project RPCs and map its status
+    (see migrations 0004 and 0006) onto HTTP errors.
+    """
+    try:
+        result = await _request("POST", f"rpc/{function}", json=args)
+    except httpx.HTTPStatusError as e:
+        print(f"Database error in {function}: {e}")
+        if e.response.status_code in (400, 409):
+            # Constraint violations / invalid input: retrying the same data cannot succeed
+            raise HTTPException(status_code=422, detail=f"Invalid project data: {e.response.text}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        print(f"Database error in {function}: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    finally:
+        # The row may have changed (even on a failed or forbidden call)
+        invalidate_project(args["p_id"])
+
+    status = result.get("status")
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Project not found")
+    if status == "forbidden":
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    return result
+
+
+async def update_project_owned(project_id: str, user_id: str, data: dict) -> dict:
+    """
+    Update a project only if `user_id` owns it, in a single round trip
+    (the `update_project_owned` RPC, migration 0004).
+
+    Args:
+        project_id: The UUID of the project
+        user_id: The UUID of the caller that must own it
+        data: Dictionary of fields to update (may be empty)
+
+    Returns:
+        dict: The updated project data
+
+    Raises:
+        HTTPException: 404 if the project does not exist, 403 if another
+            user owns it, 422 if the data violates a constraint, 500 on
+            database errors
+    """
+    result = await _owned_rpc("update_project_owned", {
+        "p_id": project_id,
+        "p_user_id": user_id,
+        "p_data": data,
+    })
+    _cache_project(result["project"])
+    return dict(result["project"])
+
+
+async def patch_wizard_data(project_id: str, user_id: str, patch: dict) -> int:
+    """
+    Apply a JSON Merge Patch (RFC 7396) to a project's wizard_data
+    server-side, without sending or rewriting the rest of the blob.
+
+    Returns:
+        int: Length of the stored discovery history
+
+    Raises:
+        HTTPException: 404/403 as update_project_owned, 500 on database errors
+    """
+    result = await _owned_rpc("patch_project_wizard_data", {
+        "p_id": project_id,
+        "p_user_id": user_id,
+        "p_patch": patch,
+    })
+    return result["discovery_length"]
+
+
+async def put_discovery_answer(project_id: str, user_id: str, index: int, item: dict) -> int:
+    """
+    Store the answer to discovery question `index` (0-based), dropping any
+    later answers, and set currentDiscoveryStep to index + 1.
+
+    Returns:
+        int: Length of the stored discovery history
+
+    Raises:
+        HTTPException: 409 if `index` is past the end of the stored history,
+            404/403 as update_project_owned, 500 on database errors
+    """
+    result = await _owned_rpc("put_discovery_answer", {
+        "p_id": project_id,
+        "p_user_id": user_id,
+        "p_index": index,
+        "p_item": item,
+    })
+    if result.get("status") == "conflict":
+        raise HTTPException(status_code=409, detail="Discovery answers must be saved in order")
+    return result["discovery_length"]
+
+
+async def update_project_quotes(rows: list[dict], from_statuses: tuple) -> list[dict]:
+    """
+    Write a different quote to each of many projects in a single statement
+    (the `update_project_quotes` RPC, migration 0009). Only the ai_* quote
+    columns are set, and only on projects that still exist, are unpaid and
+    are in one of `from_statuses`; nothing is inserted.
+
+    Args:
+        rows: `id` plus the ai_* quote columns for each project
+        from_statuses: Statuses a project must still be in to be updated
+
+    Returns:
+        list: The updated rows
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    if not rows:
+        return []
+    try:
+        written = await _request("POST", "rpc/update_project_quotes", json={
+            "p_rows": rows,
+            "p_from_statuses": list(from_statuses),
+        })
+        for row in written:
+            _cache_project(row)
+        return written
+    except Exception as e:
+        print(f"Database error in update_project_quotes: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def set_projects_status(project_ids: list[str], status: str, from_statuses: tuple) -> list[str]:
+    """
+    Move projects to `status`, but only those still in one of `from_statuses`
+    and unpaid (checked by the UPDATE itself, so a concurrent payment wins).
+
+    Returns:
+        list: IDs of the projects that were updated
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    if not project_ids:
+        return []
+    try:
+        rows = await _request(
+            "PATCH", "projects",
+            params={
+                "id": f"in.({','.join(project_ids)})",
+                "status": f"in.({','.join(from_statuses)})",
+                "deposit_paid": "is.false",
+                "select": "id",
+            },
+            json={"status": status},
+            prefer="return=representation",
+        )
+        for row in rows:
+            invalidate_project(str(row["id"]))
+        return [str(row["id"]) for row in rows]
+    except Exception as e:
+        print(f"Database error in set_projects_status: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def mark_deposit_paid(project_id: str) -> dict:
+    """
+    Mark a project's deposit as paid and update status to 'building'.
+
+    Args:
+        project_id: The UUID of the project
+
+    Returns:
+        dict: The updated project data
+    """
+    return await update_project(project_id, {
+        "deposit_paid": True,
+        "status": "building"
+    })
+
+
+async def record_stripe_event(event_id: str, event_type: str, project_id: Optional[str]) -> bool:
+    """
+    Insert a Stripe event into the dedupe log (migration 0007).
+
+    Returns:
+        bool: True if the event is new, False if it was already recorded
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    try:
+        rows = await _request(
+            "POST", "stripe_events",
+            params={"on_conflict": "id"},
+            json={"id": event_id, "type": event_type, "project_id": project_id},
+            prefer="resolution=ignore-duplicates,return=representation",
+        )
+        return bool(rows)
+    except Exception as e:
+        print(f"Database error in record_stripe_event: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def finish_stripe_event(event_id: str, status: str, attempts: int, error: Optional[str] = None) -> None:
+    """
+    Record the outcome of processing a Stripe event ('processed' or 'failed').
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    try:
+        await _request("PATCH", "stripe_events", params={"id": f"eq.{event_id}"}, json={
+            "status": status,
+            "attempts": attempts,
+            "last_error": error,
+            "processed_at": datetime.now(timezone.utc).isoformat(),
+        })
+    except Exception as e:
+        print(f"Database error in finish_stripe_event: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+async def get_pending_stripe_events() -> list[dict]:
+    """
+    Fetch events that were acknowledged but not yet processed, oldest first.
+
+    Raises:
+        HTTPException: 500 error if database operation fails
+    """
+    try:
+        return await _request("GET", "stripe_events", params={
+            "select": "id,type,project_id,attempts",
+            "status": "eq.pending",
+            "order": "received_at.asc",
+        })
+    except Exception as e:
+        print(f"Database error in get_pending_stripe_events: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
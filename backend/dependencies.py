@@ -3,34 +3,190 @@ VectorWeb Labs - API Dependencies
 Handles authentication and common dependencies.
 """
 
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Any
+
+import httpx
+import jwt
+from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import Client
 import db
 
+load_dotenv()
+
+# Auth mode: 'local' verifies JWTs in-process, 'remote' asks Supabase Auth on
+# every request (use it when immediate session revocation matters).
+AUTH_MODE = os.getenv("AUTH_MODE", "local").lower()
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL = f"{db.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "600"))
+# Agency staff: users whose app_metadata.role is listed, or whose email is allowlisted
+STAFF_ROLES = {"staff", "admin"}
+STAFF_EMAILS = {e.strip().lower() for e in os.getenv("STAFF_EMAILS", "").split(",") if e.strip()}
+# Minimum gap between refetches triggered by an unknown `kid`
+JWKS_MIN_REFRESH_INTERVAL = 30.0
+
 # Initialize security scheme
 security = HTTPBearer()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+
+class AuthUser:
+    """Authenticated user built from verified JWT claims."""
+
+    def __init__(self, claims: dict):
+        self.id: str = claims["sub"]
+        self.email: Optional[str] = claims.get("email")
+        self.role: Optional[str] = claims.get("role")
+        self.app_metadata: dict = claims.get("app_metadata") or {}
+        self.claims = claims
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CACHES
+# ══════════════════════════════════════════════════════════════════════════════
+
+# sha256(token) -> (expires_at, user)
+_user_cache: "OrderedDict[str, tuple[float, AuthUser]]" = OrderedDict()
+
+_jwks_keys: dict[str, jwt.PyJWK] = {}
+_jwks_fetched_at: float = 0.0
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _cache_get(key: str) -> Optional[AuthUser]:
+    entry = _user_cache.get(key)
+    if not entry:
+        return None
+    expires_at, user = entry
+    if expires_at <= time.time():
+        _user_cache.pop(key, None)
+        return None
+    _user_cache.move_to_end(key)
+    return user
+
+
+def _cache_put(key: str, user: AuthUser) -> None:
+    # Never cache past the token's own expiry
+    expires_at = min(time.time() + AUTH_CACHE_TTL, float(user.claims.get("exp", 0)))
+    _user_cache[key] = (expires_at, user)
+    _user_cache.move_to_end(key)
+    while len(_user_cache) > AUTH_CACHE_SIZE:
+        _user_cache.popitem(last=False)
+
+
+async def _refresh_jwks() -> None:
+    global _jwks_keys, _jwks_fetched_at
+    async with httpx.AsyncClient(timeout=5) as http:
+        response = await http.get(SUPABASE_JWKS_URL)
+        response.raise_for_status()
+    keys = {}
+    for jwk in jwt.PyJWKSet.from_dict(response.json()).keys:
+        keys[jwk.key_id] = jwk
+    _jwks_keys = keys
+    _jwks_fetched_at = time.time()
+
+
+async def _get_signing_key(kid: Optional[str]) -> jwt.PyJWK:
+    """
+    Return the JWKS key for `kid`, refetching when stale or on an unknown kid
+    (key rotation).
     """
-    Verify the JWT token with Supabase and return the user.
+    age = time.time() - _jwks_fetched_at
+    if age > JWKS_CACHE_TTL or (kid not in _jwks_keys and age > JWKS_MIN_REFRESH_INTERVAL):
+        await _refresh_jwks()
+    if kid not in _jwks_keys:
+        raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+    return _jwks_keys[kid]
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# VERIFICATION
+# ══════════════════════════════════════════════════════════════════════════════
+
+async def _verify_local(token: str) -> Optional[AuthUser]:
+    """
+    Verify signature, expiry and audience in-process.
+    Returns None if no local key material is available for this token.
+    """
+    header = jwt.get_unverified_header(token)
+
+    if header.get("alg") == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            return None
+        key: Any = SUPABASE_JWT_SECRET
+        algorithm = "HS256"
+    else:
+        signing_key = await _get_signing_key(header.get("kid"))
+        key = signing_key.key
+        algorithm = signing_key.algorithm_name
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub"]},
+    )
+    return AuthUser(claims)
+
+
+async def _verify_remote(token: str) -> Any:
+    """
+    Verify the token with Supabase Auth (picks up revoked sessions).
+    """
+    # Note: supabase-py's get_user method takes the JWT directly
+    user = await run_in_threadpool(db.supabase.auth.get_user, token)
+    if not user or not user.user:
+        return None
+    return user.user
+
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Any:
+    """
+    Verify the JWT token and return the user.
+
+    In 'local' mode the token is checked against the JWT secret / cached JWKS
+    and the result is cached briefly by token hash. Tokens we hold no key for
+    fall back to Supabase Auth, which is also used for everything in 'remote'
+    mode.
     """
     token = credentials.credentials
-    
+
     try:
-        # Verify user with Supabase Auth
-        # Note: supabase-py's get_user method takes the JWT directly
-        user = db.supabase.auth.get_user(token)
-        
-        if not user or not user.user:
+        user = None
+        if AUTH_MODE != "remote":
+            cache_key = _token_key(token)
+            user = _cache_get(cache_key)
+            if user:
+                return user
+            user = await _verify_local(token)
+            if user:
+                _cache_put(cache_key, user)
+
+        if not user:
+            user = await _verify_remote(token)
+
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid authentication credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-            
-        return user.user
-        
+
+        return user
+
     except Exception as e:
         print(f"Auth error: {e}")
         raise HTTPException(
@@ -38,3 +194,17 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def get_staff_user(user: Any = Depends(get_current_user)) -> Any:
+    """
+    Require an agency staff member (app_metadata.role in STAFF_ROLES, or an
+    email listed in STAFF_EMAILS).
+    """
+    app_metadata = getattr(user, "app_metadata", None) or {}
+    email = (getattr(user, "email", None) or "").lower()
+
+    if app_metadata.get("role") not in STAFF_ROLES and email not in STAFF_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Staff access required")
+
+    return user
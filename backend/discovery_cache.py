@@ -0,0 +1,188 @@
+"""
+VectorWeb Labs - Discovery Question Cache
+Prefix trie of generated discovery questions, keyed by industry and the
+normalized (question, answer) path that led to each step. Sessions that
+share an industry and early answers reuse the same generated questions.
+"""
+
+import os
+import re
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Iterator
+
+DISCOVERY_CACHE_SIZE = int(os.getenv("DISCOVERY_CACHE_SIZE", "5000"))
+DISCOVERY_CACHE_TTL = float(os.getenv("DISCOVERY_CACHE_TTL", str(7 * 24 * 3600)))
+DISCOVERY_CACHE_PATH = os.getenv("DISCOVERY_CACHE_PATH")  # JSON file written by discovery_warmup.py
+
+# Placeholder client name used by the warm-up; questions mentioning it are safe to share
+NEUTRAL_BUSINESS_NAME = "Your Business"
+# Shorter names ("A", "Co") can't be told apart from ordinary words, and don't identify anyone
+MIN_IDENTIFYING_NAME_LENGTH = 3
+
+
+def _normalize_text(value) -> str:
+    return " ".join(str(value).split()).lower()
+
+
+def names_client(business_name: str, question: dict) -> bool:
+    """
+    Whether a generated question mentions the client's business name (as
+    whole words), which would make it unsafe to serve to other clients.
+    """
+    name = _normalize_text(business_name or "")
+    if len(name) < MIN_IDENTIFYING_NAME_LENGTH or name == _normalize_text(NEUTRAL_BUSINESS_NAME):
+        return False
+    return re.search(rf"(?<!\w){re.escape(name)}(?!\w)", _normalize_text(json.dumps(question, ensure_ascii=False))) is not None
+
+
+def _normalize_answer(answer) -> str:
+    """Multi-select answers arrive as "A, B"; selection order is irrelevant."""
+    if isinstance(answer, list):
+        parts = answer
+    else:
+        parts = str(answer).split(",")
+    return "|".join(sorted(_normalize_text(p) for p in parts if str(p).strip()))
+
+
+def path_for(previous_answers: list[dict]) -> tuple[str, ...]:
+    """Trie path for a discovery history: one edge per (question, answer)."""
+    return tuple(
+        f"{_normalize_text(item.get('q', ''))}\x1f{_normalize_answer(item.get('a', ''))}"
+        for item in previous_answers
+    )
+
+
+class _Node:
+    __slots__ = ("children", "questions")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        self.questions: dict[int, dict] = {}  # current_q_index -> question payload
+
+
+class DiscoveryCache:
+    """
+    Trie of questions with LRU eviction over entries and a per-entry TTL.
+    Tracks hits, misses and evictions.
+    """
+
+    def __init__(self, max_entries: int = DISCOVERY_CACHE_SIZE, ttl: float = DISCOVERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._roots: dict[str, _Node] = {}
+        # (industry, path, q_index) -> expires_at, in LRU order
+        self._entries: "OrderedDict[tuple, float]" = OrderedDict()
+
+    def _walk(self, industry: str, path: tuple[str, ...], create: bool = False) -> list[_Node]:
+        """Nodes from the industry root down to `path` (shorter if missing)."""
+        node = self._roots.get(industry)
+        if node is None:
+            if not create:
+                return []
+            node = self._roots[industry] = _Node()
+        nodes = [node]
+        for edge in path:
+            child = node.children.get(edge)
+            if child is None:
+                if not create:
+                    break
+                child = node.children[edge] = _Node()
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def _remove(self, key: tuple) -> None:
+        industry, path, q_index = key
+        self._entries.pop(key, None)
+        nodes = self._walk(industry, path)
+        if len(nodes) != len(path) + 1:
+            return
+        nodes[-1].questions.pop(q_index, None)
+        # Prune now-empty branches bottom-up
+        for depth in range(len(path), 0, -1):
+            node = nodes[depth]
+            if node.children or node.questions:
+                break
+            del nodes[depth - 1].children[path[depth - 1]]
+        if not nodes[0].children and not nodes[0].questions:
+            self._roots.pop(industry, None)
+
+    def _lookup(self, industry: str, path: tuple[str, ...], q_index: int) -> Optional[dict]:
+        key = (industry, path, q_index)
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            return None
+        if expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return self._walk(industry, path)[-1].questions[q_index]
+
+    def _insert(self, industry: str, path: tuple[str, ...], q_index: int, question: dict) -> None:
+        key = (industry, path, q_index)
+        self._walk(industry, path, create=True)[-1].questions[q_index] = question
+        self._entries[key] = time.time() + self.ttl
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def get(self, industry: str, current_q_index: int, previous_answers: list[dict]) -> Optional[dict]:
+        question = self._lookup(_normalize_text(industry), path_for(previous_answers), current_q_index)
+        if question is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(json.dumps(question))  # callers get their own copy
+
+    def put(self, industry: str, current_q_index: int, previous_answers: list[dict], question: dict) -> None:
+        self._insert(_normalize_text(industry), path_for(previous_answers), current_q_index, question)
+
+    def entries(self) -> Iterator[tuple[str, tuple[str, ...], int, dict]]:
+        for industry, path, q_index in list(self._entries):
+            question = self._lookup(industry, path, q_index)
+            if question is not None:
+                yield industry, path, q_index, question
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def save(self, file_path: str) -> int:
+        """Write all live entries to a JSON file. Returns the entry count."""
+        rows = [
+            {"industry": industry, "path": list(path), "q_index": q_index, "question": question}
+            for industry, path, q_index, question in self.entries()
+        ]
+        with open(file_path, "w") as f:
+            json.dump(rows, f)
+        return len(rows)
+
+    def load(self, file_path: str) -> int:
+        """Load entries written by save(). Returns the entry count."""
+        with open(file_path) as f:
+            rows = json.load(f)
+        for row in rows:
+            self._insert(row["industry"], tuple(row["path"]), row["q_index"], row["question"])
+        return len(rows)
+
+
+discovery_cache = DiscoveryCache()
+
+if DISCOVERY_CACHE_PATH and os.path.exists(DISCOVERY_CACHE_PATH):
+    try:
+        print(f"Loaded {discovery_cache.load(DISCOVERY_CACHE_PATH)} discovery questions from {DISCOVERY_CACHE_PATH}")
+    except Exception as e:
+        print(f"Could not load discovery cache from {DISCOVERY_CACHE_PATH}: {e}")
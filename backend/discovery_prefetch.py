@@ -0,0 +1,102 @@
+"""
+VectorWeb Labs - Discovery Prefetch
+Speculatively generates question N+1 for each option of question N while the
+user is still reading, so answering can return immediately.
+"""
+
+import os
+import time
+import asyncio
+from typing import Optional
+
+import ai
+from discovery_cache import path_for
+
+DISCOVERY_PREFETCH_CONCURRENCY = int(os.getenv("DISCOVERY_PREFETCH_CONCURRENCY", "8"))
+DISCOVERY_PREFETCH_MAX_BRANCHES = int(os.getenv("DISCOVERY_PREFETCH_MAX_BRANCHES", "4"))
+DISCOVERY_PREFETCH_TTL = float(os.getenv("DISCOVERY_PREFETCH_TTL", "600"))
+
+# Process-wide budget shared by all sessions' speculative LLM calls
+_semaphore = asyncio.Semaphore(DISCOVERY_PREFETCH_CONCURRENCY)
+
+
+class _Session:
+    def __init__(self):
+        self.branches: dict[tuple[str, ...], asyncio.Task] = {}
+        self.expires_at = time.time() + DISCOVERY_PREFETCH_TTL
+
+    def cancel(self, keep: Optional[asyncio.Task] = None) -> None:
+        for task in self.branches.values():
+            if task is not keep and not task.done():
+                task.cancel()
+        self.branches.clear()
+
+
+_sessions: dict[str, _Session] = {}
+
+
+def _prune() -> None:
+    now = time.time()
+    for session_id in [s for s, session in _sessions.items() if session.expires_at <= now]:
+        _sessions.pop(session_id).cancel()
+
+
+async def _generate(business_name: str, industry: str, history: list[dict]) -> dict:
+    async with _semaphore:
+        return await ai.generate_discovery_question_async(business_name, industry, len(history), history)
+
+
+def start(session_id: str, business_name: str, industry: str, previous_answers: list[dict], question: dict) -> int:
+    """
+    Begin generating the follow-up to `question` for each of its options.
+    Replaces any branches left over from the session's previous step.
+    Returns the number of branches started.
+    """
+    _prune()
+    if question.get("is_complete") or not question.get("question"):
+        return 0
+    # The last step has no follow-up worth generating
+    if len(previous_answers) + 1 >= 10:
+        return 0
+
+    session = _sessions.pop(session_id, None)
+    if session:
+        session.cancel()
+    session = _sessions[session_id] = _Session()
+
+    for option in question.get("options", [])[:DISCOVERY_PREFETCH_MAX_BRANCHES]:
+        history = previous_answers + [{"q": question["question"], "a": option}]
+        session.branches[path_for(history)] = asyncio.create_task(
+            _generate(business_name, industry, history)
+        )
+    return len(session.branches)
+
+
+async def take(session_id: str, current_q_index: int, previous_answers: list[dict]) -> Optional[dict]:
+    """
+    Return the prefetched question for this answer path, if one was started.
+    All other branches of the session are cancelled. Waits for the branch if
+    it is still in flight; returns None on a miss or if the branch failed.
+    """
+    session = _sessions.pop(session_id, None)
+    if not session or session.expires_at <= time.time():
+        if session:
+            session.cancel()
+        return None
+
+    task = session.branches.get(path_for(previous_answers))
+    session.cancel(keep=task)
+    if not task or len(previous_answers) != current_q_index:
+        if task:
+            task.cancel()
+        return None
+
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if task.cancelled():
+            return None
+        raise
+    except Exception as e:
+        print(f"Discovery prefetch error: {e}")
+        return None
@@ -0,0 +1,83 @@
+"""
+VectorWeb Labs - Discovery Cache Warm-up
+Offline command that pre-generates the first discovery questions for common
+industries and writes them to DISCOVERY_CACHE_PATH for the API to load.
+
+Usage:
+    DISCOVERY_CACHE_PATH=discovery_cache.json python discovery_warmup.py --industry "modern web" --depth 3
+"""
+
+import sys
+import asyncio
+import argparse
+
+import ai
+from discovery_cache import discovery_cache, DISCOVERY_CACHE_PATH, NEUTRAL_BUSINESS_NAME
+
+DEFAULT_INDUSTRIES = ["modern web"]
+
+# Neutral client name so generated questions are safe to share (and still cached)
+WARMUP_BUSINESS_NAME = NEUTRAL_BUSINESS_NAME
+
+
+async def warm_industry(industry: str, depth: int, branching: int, concurrency: int) -> int:
+    """
+    Breadth-first walk of the question tree: ask question N for every cached
+    path, then extend the path with each of the first `branching` options.
+    Returns the number of questions generated.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    frontier: list[list[dict]] = [[]]
+    generated = 0
+
+    async def ask(history: list[dict]) -> tuple[list[dict], dict]:
+        async with semaphore:
+            question = await ai.generate_discovery_question_async(
+                WARMUP_BUSINESS_NAME, industry, len(history), history
+            )
+            return history, question
+
+    for q_index in range(min(depth, 10)):
+        results = await asyncio.gather(*(ask(history) for history in frontier))
+        generated += len(results)
+        print(f"[{industry}] step {q_index + 1}: {len(results)} question(s)")
+
+        next_frontier = []
+        for history, question in results:
+            if question.get("is_complete") or not question.get("question"):
+                continue
+            for option in question.get("options", [])[:branching]:
+                next_frontier.append(history + [{"q": question["question"], "a": option}])
+        frontier = next_frontier
+        if not frontier:
+            break
+
+    return generated
+
+
+async def run(industries: list[str], depth: int, branching: int, concurrency: int, output: str) -> None:
+    if not ai.get_async_client():
+        print("OPENROUTER_API_KEY is not set; nothing to warm (mock mode serves fixed questions).")
+        sys.exit(1)
+
+    for industry in industries:
+        await warm_industry(industry, depth, branching, concurrency)
+
+    count = discovery_cache.save(output)
+    print(f"Saved {count} cached questions to {output}")
+    print(f"Cache stats: {discovery_cache.stats()}")
+    await ai.close_async_client()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-populate the discovery question cache.")
+    parser.add_argument("--industry", action="append", dest="industries",
+                        help="Industry to warm (repeatable). Defaults to the wizard's 'modern web'.")
+    parser.add_argument("--depth", type=int, default=3, help="Number of questions deep to generate (default 3, i.e. phase 1).")
+    parser.add_argument("--branching", type=int, default=4, help="Options followed per question (default 4).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel LLM calls (default 8).")
+    parser.add_argument("--output", default=DISCOVERY_CACHE_PATH or "discovery_cache.json",
+                        help="Output JSON file (defaults to DISCOVERY_CACHE_PATH).")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.industries or DEFAULT_INDUSTRIES, args.depth, args.branching, args.concurrency, args.output))
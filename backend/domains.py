@@ -3,89 +3,306 @@ VectorWeb Labs - Domain Checker Service
 Handles domain availability checking via WHOIS lookups.
 """
 
-import whois
+import os
+import math
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+
+import whois
 import ai
 
+# Engine settings
+DOMAIN_CHECK_WORKERS = int(os.getenv("DOMAIN_CHECK_WORKERS", "16"))
+DOMAIN_LOOKUP_TIMEOUT = float(os.getenv("DOMAIN_LOOKUP_TIMEOUT", "5"))
+DOMAIN_REGISTRY_CONCURRENCY = int(os.getenv("DOMAIN_REGISTRY_CONCURRENCY", "4"))
+DOMAIN_REGISTRY_MIN_INTERVAL = float(os.getenv("DOMAIN_REGISTRY_MIN_INTERVAL", "0.1"))
 
-def check_availability(domain: str, vibe: str = "modern") -> dict:
-    """
-    Check if a domain is available for registration.
-    
-    Args:
-        domain: The domain to check (e.g., "coolbrand.com")
-        vibe: The brand vibe for generating alternatives if taken
-    
-    Returns:
-        dict: {
-            "available": bool,
-            "domain": str,
-            "suggestions": list[str]  # Only populated if domain is taken
-        }
-    """
+# Availability cache: "available" answers go stale quickly (someone may register
+# the name), "taken" answers rarely change. Unverified results are not cached.
+DOMAIN_CACHE_AVAILABLE_TTL = float(os.getenv("DOMAIN_CACHE_AVAILABLE_TTL", "300"))
+DOMAIN_CACHE_TAKEN_TTL = float(os.getenv("DOMAIN_CACHE_TAKEN_TTL", "86400"))
+DOMAIN_CACHE_SIZE = int(os.getenv("DOMAIN_CACHE_SIZE", "5000"))
+
+MAX_BULK_DOMAINS = 25
+
+# Suggestions: how many candidates to generate, and how long to spend verifying them
+DOMAIN_SUGGESTION_CANDIDATES = int(os.getenv("DOMAIN_SUGGESTION_CANDIDATES", "8"))
+DOMAIN_SUGGESTION_BUDGET = float(os.getenv("DOMAIN_SUGGESTION_BUDGET", "6"))
+
+_executor = ThreadPoolExecutor(max_workers=DOMAIN_CHECK_WORKERS, thread_name_prefix="whois")
+
+# domain -> (expires_at, result)
+_availability_cache: dict[str, tuple[float, dict]] = {}
+
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase, trim, and default to .com when no TLD is given."""
+    domain = domain.strip().lower()
     # Ensure domain has a TLD
     if "." not in domain:
         domain = f"{domain}.com"
-    
+    return domain
+
+
+def _whois_availability(domain: str) -> dict:
+    """
+    Blocking WHOIS lookup. Returns {"available", "domain"} plus "warning"
+    when the answer could not be verified. Never generates suggestions.
+    """
     try:
         # Perform WHOIS lookup
-        w = whois.whois(domain)
-        
+        w = whois.whois(domain, timeout=max(1, math.ceil(DOMAIN_LOOKUP_TIMEOUT)))
+
         # Check if domain is registered
         # If whois returns data with a domain_name, it's taken
-        if w.domain_name is not None:
-            # Domain is taken - generate alternatives
-            suggestions = ai.generate_domain_ideas(domain, vibe)
-            return {
-                "available": False,
-                "domain": domain,
-                "suggestions": suggestions
-            }
-        else:
-            # No domain_name in response usually means available
-            return {
-                "available": True,
-                "domain": domain,
-                "suggestions": []
-            }
-            
+        # No domain_name in response usually means available
+        return {
+            "available": w.domain_name is None,
+            "domain": domain,
+        }
+
     except Exception as e:
         # On any error, check if it indicates domain is available
         error_str = str(e).lower()
-        
+
         # Common "not found" patterns indicate domain is available
         if any(pattern in error_str for pattern in [
-            "no match", "not found", "no entries", "no data", 
+            "no match", "not found", "no entries", "no data",
             "status: available", "is available", "domain not found"
         ]):
             return {
                 "available": True,
                 "domain": domain,
-                "suggestions": []
             }
-        
+
         # For other errors, log and return available with warning
         print(f"WHOIS lookup error for {domain}: {e}")
         return {
             "available": True,
             "domain": domain,
-            "suggestions": [],
             "warning": f"Could not verify: {str(e)}"
         }
 
 
-def bulk_check(domains: list[str]) -> list[dict]:
+# ══════════════════════════════════════════════════════════════════════════════
+# CONCURRENT ENGINE
+# ══════════════════════════════════════════════════════════════════════════════
+
+class _RegistryLimiter:
+    """
+    Per-TLD rate limiting: at most `concurrency` lookups in flight against a
+    registry, started at least `min_interval` seconds apart.
     """
-    Check availability of multiple domains.
-    
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, tld: str):
+        semaphore = self._semaphores.setdefault(tld, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(tld, 0.0))
+            self._next_start[tld] = start + self.min_interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+_limiter = _RegistryLimiter(DOMAIN_REGISTRY_CONCURRENCY, DOMAIN_REGISTRY_MIN_INTERVAL)
+
+
+def _cache_get(domain: str) -> Optional[dict]:
+    entry = _availability_cache.get(domain)
+    if not entry:
+        return None
+    expires_at, result = entry
+    if expires_at <= time.time():
+        _availability_cache.pop(domain, None)
+        return None
+    return dict(result)
+
+
+def _cache_put(domain: str, result: dict) -> None:
+    if "warning" in result:
+        return
+    ttl = DOMAIN_CACHE_AVAILABLE_TTL if result["available"] else DOMAIN_CACHE_TAKEN_TTL
+    if len(_availability_cache) >= DOMAIN_CACHE_SIZE:
+        # Drop the entry closest to expiry
+        oldest = min(_availability_cache, key=lambda d: _availability_cache[d][0])
+        _availability_cache.pop(oldest, None)
+    _availability_cache[domain] = (time.time() + ttl, dict(result))
+
+
+async def lookup_availability(domain: str) -> dict:
+    """
+    Cached, rate-limited, non-blocking WHOIS availability check for one
+    domain. The lookup runs on the WHOIS thread pool with a hard timeout.
+    Adds "cached": True when served from the cache.
+    """
+    domain = normalize_domain(domain)
+    cached = _cache_get(domain)
+    if cached:
+        cached["cached"] = True
+        return cached
+
+    tld = domain.rsplit(".", 1)[-1]
+    loop = asyncio.get_running_loop()
+    try:
+        async with _limiter.slot(tld):
+            result = await asyncio.wait_for(
+                loop.run_in_executor(_executor, _whois_availability, domain),
+                timeout=DOMAIN_LOOKUP_TIMEOUT,
+            )
+    except asyncio.TimeoutError:
+        print(f"WHOIS lookup timed out for {domain}")
+        return {
+            "available": True,
+            "domain": domain,
+            "warning": "Could not verify: lookup timed out"
+        }
+
+    _cache_put(domain, result)
+    return result
+
+
+async def bulk_check(domains: list[str]) -> list[dict]:
+    """
+    Check availability of multiple domains concurrently.
+
     Args:
         domains: List of domains to check
-    
+
+    Returns:
+        list[dict]: List of availability results, in input order
+    """
+    unique = list(dict.fromkeys(normalize_domain(d) for d in domains))
+    results = await asyncio.gather(*(lookup_availability(d) for d in unique))
+    by_domain = dict(zip(unique, results))
+    return [by_domain[normalize_domain(d)] for d in domains]
+
+
+def _clean_candidate(candidate, taken: str) -> Optional[str]:
+    """Return a normalized candidate domain, or None if it is unusable."""
+    if not isinstance(candidate, str):
+        return None
+    candidate = candidate.strip().lower()
+    if not candidate or " " in candidate or "." not in candidate or candidate == taken:
+        return None
+    return candidate
+
+
+def _start_domain_ideas(domain: str, vibe: str) -> asyncio.Task:
+    """Ask the LLM for candidate names. No WHOIS traffic until they are checked."""
+    return asyncio.create_task(
+        ai.generate_domain_ideas_async(domain, vibe, count=DOMAIN_SUGGESTION_CANDIDATES)
+    )
+
+
+async def suggest_available(
+    domain: str,
+    vibe: str = "modern",
+    limit: int = 3,
+    ideas_task: Optional[asyncio.Task] = None,
+) -> list[str]:
+    """
+    Suggest alternatives to a taken domain that are verified available.
+
+    Overgenerates candidates (deterministic fallbacks straight away, LLM
+    ideas when they arrive), checks them all concurrently through the
+    availability cache, and returns up to `limit` names that WHOIS confirmed
+    free within DOMAIN_SUGGESTION_BUDGET seconds. LLM ideas are preferred.
+    `ideas_task` is an already started _start_domain_ideas call to use.
+    """
+    domain = normalize_domain(domain)
+    deadline = time.monotonic() + DOMAIN_SUGGESTION_BUDGET
+    llm_task = ideas_task or _start_domain_ideas(domain, vibe)
+    checks: dict[str, asyncio.Task] = {}
+
+    def start_checks(candidates) -> None:
+        for candidate in candidates:
+            candidate = _clean_candidate(candidate, domain)
+            if candidate and candidate not in checks:
+                checks[candidate] = asyncio.create_task(lookup_availability(candidate))
+
+    start_checks(ai.fallback_domain_ideas(domain))
+    fallbacks = list(checks)
+
+    def verified(task: asyncio.Task) -> bool:
+        if not task.done() or task.cancelled() or task.exception():
+            return False
+        result = task.result()
+        return result["available"] and "warning" not in result
+
+    try:
+        pending = {llm_task, *checks.values()}
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if llm_task in done:
+                before = set(checks.values())
+                start_checks(llm_task.result())
+                pending |= set(checks.values()) - before
+            # Enough verified names already; don't wait on slow registries
+            if llm_task.done() and sum(verified(t) for t in checks.values()) >= limit:
+                break
+    finally:
+        for task in [llm_task, *checks.values()]:
+            if not task.done():
+                task.cancel()
+
+    llm_ideas = [c for c in checks if c not in fallbacks]
+    ordered = llm_ideas + [c for c in checks if c in fallbacks]
+    return [c for c in ordered if verified(checks[c])][:limit]
+
+
+async def check_availability(domain: str, vibe: str = "modern") -> dict:
+    """
+    Check if a domain is available for registration.
+
+    On a cache miss the LLM name ideas are requested alongside the WHOIS
+    lookup and cancelled if the domain turns out to be free. Candidates are
+    only WHOIS-checked (see suggest_available) once the domain is confirmed
+    taken, so a free domain costs a single registry query. Suggestions are
+    verified available.
+
+    Args:
+        domain: The domain to check (e.g., "coolbrand.com")
+        vibe: The brand vibe for generating alternatives if taken
+
     Returns:
-        list[dict]: List of availability results
+        dict: {
+            "available": bool,
+            "domain": str,
+            "suggestions": list[str]  # Only populated if domain is taken
+        }
     """
-    results = []
-    for domain in domains:
-        result = check_availability(domain)
-        results.append(result)
-    return results
+    domain = normalize_domain(domain)
+
+    ideas_task = None
+    if _cache_get(domain) is None:
+        ideas_task = _start_domain_ideas(domain, vibe)
+
+    try:
+        result = await lookup_availability(domain)
+    except BaseException:
+        if ideas_task:
+            ideas_task.cancel()
+        raise
+
+    if result["available"]:
+        if ideas_task:
+            ideas_task.cancel()
+        result["suggestions"] = []
+    else:
+        # Domain is taken - generate alternatives
+        result["suggestions"] = await suggest_available(domain, vibe, ideas_task=ideas_task)
+    return result
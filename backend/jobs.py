@@ -0,0 +1,153 @@
+"""
+VectorWeb Labs - Background Jobs
+In-process asyncio worker pool for long-running work (AI quote generation)
+so HTTP requests can return a job id immediately.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from typing import Optional, Any, Callable, Awaitable
+
+import db_async
+
+# Number of concurrent workers and how long finished jobs stay queryable
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+
+class Job:
+    """A unit of background work and its observable state."""
+
+    def __init__(self, kind: str, project_id: str, user_id: Optional[str], run: Callable[["Job"], Awaitable[Any]]):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.project_id = project_id
+        self.user_id = user_id
+        self.status = "queued"
+        self.progress = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.version = 0
+        self._run = run
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def update(self, status: Optional[str] = None, progress: Optional[str] = None) -> None:
+        """Record a state change and wake anyone watching this job."""
+        if status:
+            self.status = status
+        if progress:
+            self.progress = progress
+        self.updated_at = time.time()
+        self.version += 1
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, version: int, timeout: float) -> bool:
+        """Wait until the job moves past `version`. Returns False on timeout."""
+        if self.version != version:
+            return True
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "project_id": self.project_id,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class JobQueue:
+    """Bounded pool of asyncio workers consuming an in-memory queue."""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+        self._jobs: dict[str, Job] = {}
+        self._latest_by_project: dict[str, str] = {}
+
+    def _ensure_started(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        # Workers outlive the request that starts them, so they must not share its cache
+        self._tasks = [
+            asyncio.create_task(self._worker(), context=db_async.background_context())
+            for _ in range(self.workers)
+        ]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                job.update(status="running", progress="running")
+                job.result = await job._run(job)
+                job.update(status="succeeded", progress="done")
+            except asyncio.CancelledError:
+                job.error = "Cancelled"
+                job.update(status="failed", progress="cancelled")
+                raise
+            except Exception as e:
+                print(f"Job {job.id} ({job.kind}) failed: {e}")
+                job.error = getattr(e, "detail", None) or str(e)
+                job.update(status="failed", progress="error")
+            finally:
+                self._queue.task_done()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.updated_at < cutoff]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if self._latest_by_project.get(job.project_id) == job_id:
+                del self._latest_by_project[job.project_id]
+
+    def submit(self, kind: str, project_id: str, run: Callable[[Job], Awaitable[Any]], user_id: Optional[str] = None) -> Job:
+        """
+        Enqueue `run(job)` and return the job handle immediately.
+        """
+        self._ensure_started()
+        self._prune()
+        job = Job(kind, project_id, user_id, run)
+        self._jobs[job.id] = job
+        self._latest_by_project[project_id] = job.id
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def latest_for_project(self, project_id: str) -> Optional[Job]:
+        job_id = self._latest_by_project.get(project_id)
+        return self._jobs.get(job_id) if job_id else None
+
+    async def stop(self) -> None:
+        """Cancel the workers. Called from the app lifespan on shutdown."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+queue = JobQueue()
@@ -0,0 +1,209 @@
+"""
+VectorWeb Labs - Model Router
+Chooses the OpenRouter model for each task from a candidate list, using the
+rolling latency (p50/p95) and error rate observed per model in this process.
+
+    - Healthy models are tried fastest-first by p50. A model whose recent
+      error rate reaches MODEL_ROUTER_MAX_ERROR_RATE moves to the back until
+      its failures age out of the window.
+    - Models with too few samples go first, in configured order, so every
+      candidate gets measured.
+    - If the chosen model has not answered after the hedge delay, the next
+      candidate is raced against it. The first success wins and the other
+      request is cancelled. An error fails over to the next candidate at once.
+
+Candidates per task come from MODEL_ROUTER_<TASK>_MODELS (comma-separated),
+e.g. MODEL_ROUTER_QUOTE_MODELS="google/gemini-2.0-flash-001,meta-llama/...".
+"""
+
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+LLAMA_FREE = "meta-llama/llama-3.3-70b-instruct:free"
+GEMINI_FLASH = "google/gemini-2.0-flash-001"
+
+# Per-model rolling window: the last N calls, no older than WINDOW_SECONDS
+MODEL_ROUTER_WINDOW_SIZE = int(os.getenv("MODEL_ROUTER_WINDOW_SIZE", "100"))
+MODEL_ROUTER_WINDOW_SECONDS = float(os.getenv("MODEL_ROUTER_WINDOW_SECONDS", "600"))
+MODEL_ROUTER_MIN_SAMPLES = int(os.getenv("MODEL_ROUTER_MIN_SAMPLES", "3"))
+MODEL_ROUTER_MAX_ERROR_RATE = float(os.getenv("MODEL_ROUTER_MAX_ERROR_RATE", "0.5"))
+
+# Hedge delay in seconds; "auto" uses the primary model's p95 (clamped), 0 disables hedging
+MODEL_ROUTER_HEDGE_DELAY = os.getenv("MODEL_ROUTER_HEDGE_DELAY", "auto")
+MODEL_ROUTER_HEDGE_MIN = float(os.getenv("MODEL_ROUTER_HEDGE_MIN", "2"))
+MODEL_ROUTER_HEDGE_MAX = float(os.getenv("MODEL_ROUTER_HEDGE_MAX", "10"))
+
+
+def _models(task: str, default: list[str]) -> list[str]:
+    value = os.getenv(f"MODEL_ROUTER_{task.upper()}_MODELS")
+    if not value:
+        return default
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+TASK_MODELS = {
+    "default": _models("default", [LLAMA_FREE, GEMINI_FLASH]),
+    "quote": _models("quote", [LLAMA_FREE, GEMINI_FLASH]),
+    "discovery": _models("discovery", [LLAMA_FREE, GEMINI_FLASH]),
+    "domain_ideas": _models("domain_ideas", [LLAMA_FREE, GEMINI_FLASH]),
+    "chat": _models("chat", [LLAMA_FREE, GEMINI_FLASH]),
+    "vectorbot": _models("vectorbot", [GEMINI_FLASH, LLAMA_FREE]),
+}
+
+
+def _percentile(values: list[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _ModelStats:
+    """Rolling (timestamp, latency, ok) samples for one model."""
+
+    def __init__(self):
+        self.samples: deque = deque(maxlen=MODEL_ROUTER_WINDOW_SIZE)
+        self.hedge_losses = 0  # cancelled after losing a race; not a latency sample
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        self.samples.append((time.monotonic(), latency, ok))
+
+    def snapshot(self) -> dict:
+        cutoff = time.monotonic() - MODEL_ROUTER_WINDOW_SECONDS
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        samples = list(self.samples)
+        # Failed calls count towards the error rate only; their latency says nothing about speed
+        latencies = [latency for _, latency, ok in samples if ok and latency is not None]
+        errors = sum(1 for _, _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "p50": _percentile(latencies, 0.5),
+            "p95": _percentile(latencies, 0.95),
+            "error_rate": errors / len(samples) if samples else 0.0,
+            "hedge_losses": self.hedge_losses,
+        }
+
+
+class ModelRouter:
+    """Latency- and health-aware model selection with hedged requests."""
+
+    def __init__(self, task_models: dict[str, list[str]] = TASK_MODELS, hedge_delay: str = MODEL_ROUTER_HEDGE_DELAY):
+        self.task_models = task_models
+        self.hedge_delay = None if hedge_delay == "auto" else float(hedge_delay)
+        self.hedges = 0
+        self.failovers = 0
+        self._stats: dict[str, _ModelStats] = {}
+
+    def record(self, model: str, latency: Optional[float], ok: bool) -> None:
+        """Record one call. Pass latency=None for calls whose duration isn't comparable (streams)."""
+        self._stats.setdefault(model, _ModelStats()).record(latency, ok)
+
+    def candidates(self, task: str) -> list[str]:
+        """The task's models in the order they should be tried."""
+        models = self.task_models.get(task) or self.task_models["default"]
+        snapshots = {model: self._snapshot(model) for model in models}
+
+        def rank(indexed: tuple[int, str]) -> tuple:
+            index, model = indexed
+            snapshot = snapshots[model]
+            if snapshot["samples"] < MODEL_ROUTER_MIN_SAMPLES:
+                return (0, 0.0, index)
+            if snapshot["error_rate"] >= MODEL_ROUTER_MAX_ERROR_RATE:
+                return (2, snapshot["error_rate"], index)
+            p50 = snapshot["p50"] if snapshot["p50"] is not None else float("inf")
+            return (1, p50, index)
+
+        return [model for _, model in sorted(enumerate(models), key=rank)]
+
+    def pick(self, task: str) -> str:
+        """The preferred model for the task right now."""
+        return self.candidates(task)[0]
+
+    async def run(self, task: str, call: Callable[[str], Awaitable[T]]) -> T:
+        """
+        Run `call(model)` on the task's preferred model, hedging with the next
+        candidate when it is slow and failing over when it errors. Returns the
+        first successful result; raises the last error if every model fails.
+        """
+        models = iter(self.candidates(task))
+        pending: dict[asyncio.Task, str] = {}
+        last_error: Optional[BaseException] = None
+        hedged = won = False
+
+        def launch() -> bool:
+            model = next(models, None)
+            if model is None:
+                return False
+            pending[asyncio.create_task(self._timed(model, call))] = model
+            return True
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and len(pending) == 1:
+                    timeout = self._hedge_delay(next(iter(pending.values())))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    if launch():
+                        self.hedges += 1
+                    continue
+                for task_ in done:
+                    pending.pop(task_)
+                    if task_.exception() is None:
+                        won = True
+                        return task_.result()
+                    last_error = task_.exception()
+                if not pending and launch():
+                    self.failovers += 1
+        finally:
+            for task_, model in pending.items():
+                task_.cancel()
+                if won:
+                    # Its elapsed time is only a lower bound on its latency, so it is not a sample
+                    self._stats.setdefault(model, _ModelStats()).hedge_losses += 1
+        raise last_error
+
+    def stats(self) -> dict:
+        return {
+            "models": {model: self._snapshot(model) for model in self._stats},
+            "hedges": self.hedges,
+            "failovers": self.failovers,
+        }
+
+    def _snapshot(self, model: str) -> dict:
+        stats = self._stats.get(model)
+        if stats is None:
+            return {"samples": 0, "p50": None, "p95": None, "error_rate": 0.0, "hedge_losses": 0}
+        return stats.snapshot()
+
+    def _hedge_delay(self, model: str) -> Optional[float]:
+        if self.hedge_delay is not None:
+            return self.hedge_delay if self.hedge_delay > 0 else None
+        p95 = self._snapshot(model)["p95"]
+        if p95 is None:
+            return MODEL_ROUTER_HEDGE_MAX
+        return min(MODEL_ROUTER_HEDGE_MAX, max(MODEL_ROUTER_HEDGE_MIN, p95))
+
+    async def _timed(self, model: str, call: Callable[[str], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        try:
+            result = await call(model)
+        except asyncio.CancelledError:
+            raise  # lost a hedge race (run() counts it) or the caller went away
+        except Exception:
+            self.record(model, time.monotonic() - started, ok=False)
+            raise
+        self.record(model, time.monotonic() - started, ok=True)
+        return result
+
+
+model_router = ModelRouter()
@@ -4,12 +4,19 @@ Handles Stripe checkout sessions and webhooks.
 """
 
 import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Optional
 import stripe
 from fastapi import APIRouter, HTTPException, Request, Header, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-import db
+import db_async
 from dependencies import get_current_user
 
 load_dotenv()
@@ -19,6 +26,17 @@ stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 DOMAIN_URL = os.getenv("NEXT_PUBLIC_APP_URL", "http://localhost:3000")
 
+# Checkout sessions are reused per project for up to this long (Stripe needs >= 30 min to expiry)
+CHECKOUT_SESSION_TTL = int(os.getenv("CHECKOUT_SESSION_TTL", "3600"))
+CHECKOUT_MIN_EXPIRY = 1800
+
+# Webhook event processing
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv("STRIPE_EVENT_MAX_ATTEMPTS", "5"))
+STRIPE_EVENT_RETRY_DELAY = float(os.getenv("STRIPE_EVENT_RETRY_DELAY", "2"))  # doubles per attempt
+STRIPE_EVENT_DEDUPE_TTL = float(os.getenv("STRIPE_EVENT_DEDUPE_TTL", "86400"))
+STRIPE_EVENT_DEDUPE_SIZE = 10000
+HANDLED_EVENT_TYPES = {"checkout.session.completed"}
+
 router = APIRouter(prefix="/api", tags=["payments"])
 
 
@@ -26,13 +44,115 @@ class CreateCheckoutRequest(BaseModel):
     project_id: str
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# CHECKOUT
+# ══════════════════════════════════════════════════════════════════════════════
+
+# project_id -> {"id", "url", "params_key", "expires_at"} of a session that is still open
+_open_sessions: dict[str, dict] = {}
+# Concurrent clicks for the same project share one Stripe call
+_inflight_sessions: dict[str, asyncio.Task] = {}
+
+
+def _checkout_params(project: dict, user_id: str, amount: int) -> dict:
+    """Everything sent to Stripe for a deposit session, except the expiry."""
+    project_id = str(project["id"])
+    return {
+        "payment_method_types": ['card'],
+        "line_items": [
+            {
+                'price_data': {
+                    'currency': 'usd',
+                    'product_data': {
+                        'name': f"50% Deposit - {project.get('business_name')}",
+                        'description': 'Initial deposit to start development',
+                    },
+                    'unit_amount': amount,
+                },
+                'quantity': 1,
+            },
+        ],
+        "mode": 'payment',
+        "success_url": f"{DOMAIN_URL}/dashboard?payment_success=true",
+        "cancel_url": f"{DOMAIN_URL}/dashboard?payment_cancelled=true",
+        "metadata": {
+            "project_id": project_id,
+            "user_id": user_id
+        },
+    }
+
+
+def _params_key(params: dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _cached_session(project_id: str, params_key: str) -> Optional[dict]:
+    session = _open_sessions.get(project_id)
+    if not session:
+        return None
+    # Any change to what would be sent (amount, business name, ...) needs a new session.
+    # Leave the customer a minute to finish on Stripe's page.
+    if session["params_key"] != params_key or session["expires_at"] - 60 <= time.time():
+        _open_sessions.pop(project_id, None)
+        return None
+    return session
+
+
+async def _session_status(session: dict) -> Optional[str]:
+    """Stripe's current status for a cached session ("open", "complete", "expired"), None if unknown."""
+    try:
+        current = await run_in_threadpool(stripe.checkout.Session.retrieve, session["id"])
+    except Exception as e:
+        print(f"Stripe Error checking session {session['id']}: {e}")
+        return None
+    return current.status
+
+
+def forget_checkout_session(project_id: str) -> None:
+    """Drop a project's cached session (e.g. once it has been paid)."""
+    _open_sessions.pop(project_id, None)
+
+
+async def _create_stripe_session(project: dict, user_id: str, amount: int, replaces: Optional[str] = None) -> str:
+    """
+    Create the deposit session off the event loop. The expiry comes from a
+    CHECKOUT_SESSION_TTL time bucket and the idempotency key hashes every
+    parameter sent, so retries within a bucket get the same session back
+    from Stripe, while any changed parameter gets a new one. `replaces` is
+    the id of a session that can no longer be used, so the key differs from
+    the one that created it.
+    """
+    project_id = str(project["id"])
+    params = _checkout_params(project, user_id, amount)
+    params_key = _params_key(params)
+    bucket = int(time.time() // CHECKOUT_SESSION_TTL)
+    expires_at = (bucket + 1) * CHECKOUT_SESSION_TTL + CHECKOUT_MIN_EXPIRY
+    idempotency_key = _params_key({**params, "expires_at": expires_at, "replaces": replaces})
+
+    checkout_session = await run_in_threadpool(
+        stripe.checkout.Session.create,
+        **params,
+        expires_at=expires_at,
+        idempotency_key=idempotency_key,
+    )
+    _open_sessions[project_id] = {
+        "id": checkout_session.id,
+        "url": checkout_session.url,
+        "params_key": params_key,
+        "expires_at": expires_at,
+    }
+    return checkout_session.url
+
+
 @router.post("/create-checkout-session")
 async def create_checkout_session(data: CreateCheckoutRequest, user: dict = Depends(get_current_user)):
     """
     Create a Stripe Checkout Session for the 50% deposit.
+    An unexpired session created with the same parameters is reused while
+    Stripe still reports it open.
     """
     project_id = data.project_id
-    project = db.get_project(project_id)
+    project = await db_async.get_project(project_id)
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -41,44 +161,136 @@ async def create_checkout_session(data: CreateCheckoutRequest, user: dict = Depe
     if project.get("user_id") != user.id:
         raise HTTPException(status_code=403, detail="Not authorized to pay for this project")
 
+    if project.get("deposit_paid"):
+        raise HTTPException(status_code=409, detail="Deposit already paid")
+
     # Calculate deposit (50% of quote)
     full_price = project.get("ai_price_quote", 0) or 1000  # Fallback to $1000 if 0
     deposit_amount = int(full_price * 0.5 * 100)  # Cents
 
+    replaces = None
+    session = _cached_session(project_id, _params_key(_checkout_params(project, user.id, deposit_amount)))
+    if session:
+        status = await _session_status(session)
+        if status == "open":
+            return {"checkout_url": session["url"]}
+        forget_checkout_session(project_id)
+        if status == "complete":
+            # Paid; the webhook that marks the deposit just hasn't been applied yet
+            raise HTTPException(status_code=409, detail="Deposit already paid")
+        replaces = session["id"]
+
     try:
-        checkout_session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=[
-                {
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': f"50% Deposit - {project.get('business_name')}",
-                            'description': 'Initial deposit to start development',
-                        },
-                        'unit_amount': deposit_amount,
-                    },
-                    'quantity': 1,
-                },
-            ],
-            mode='payment',
-            success_url=f"{DOMAIN_URL}/dashboard?payment_success=true",
-            cancel_url=f"{DOMAIN_URL}/dashboard?payment_cancelled=true",
-            metadata={
-                "project_id": project_id,
-                "user_id": user.id
-            }
-        )
-        return {"checkout_url": checkout_session.url}
+        task = _inflight_sessions.get(project_id)
+        if task is None:
+            task = asyncio.create_task(_create_stripe_session(project, user.id, deposit_amount, replaces))
+            _inflight_sessions[project_id] = task
+            task.add_done_callback(
+                lambda done: _inflight_sessions.pop(project_id) if _inflight_sessions.get(project_id) is done else None
+            )
+        return {"checkout_url": await asyncio.shield(task)}
     except Exception as e:
         print(f"Stripe Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# WEBHOOK EVENT PIPELINE
+# ══════════════════════════════════════════════════════════════════════════════
+# The webhook only verifies, dedupes and records an event, then acknowledges.
+# A local worker applies it with retries; rows left 'pending' in stripe_events
+# (e.g. after a restart) are resumed on startup.
+
+_seen_events: "OrderedDict[str, float]" = OrderedDict()  # event id -> expires_at
+_event_queue: Optional[asyncio.Queue] = None
+_event_worker: Optional[asyncio.Task] = None
+
+
+def _seen(event_id: str) -> bool:
+    now = time.time()
+    while _seen_events and next(iter(_seen_events.values())) <= now:
+        _seen_events.popitem(last=False)
+    return event_id in _seen_events
+
+
+def _remember(event_id: str) -> None:
+    _seen_events[event_id] = time.time() + STRIPE_EVENT_DEDUPE_TTL
+    _seen_events.move_to_end(event_id)
+    while len(_seen_events) > STRIPE_EVENT_DEDUPE_SIZE:
+        _seen_events.popitem(last=False)
+
+
+def _enqueue_event(event_id: str, event_type: str, project_id: Optional[str], attempt: int = 1) -> None:
+    global _event_queue, _event_worker
+    if _event_worker is None or _event_worker.done():
+        _event_queue = asyncio.Queue()
+        # Usually first started from a webhook request; keep it out of that request's cache
+        _event_worker = asyncio.create_task(_process_events(), context=db_async.background_context())
+    _event_queue.put_nowait((event_id, event_type, project_id, attempt))
+
+
+async def _apply_event(event_type: str, project_id: Optional[str]) -> None:
+    if event_type == "checkout.session.completed" and project_id:
+        await db_async.mark_deposit_paid(project_id)
+        forget_checkout_session(project_id)
+        print(f"Payment successful for project {project_id}")
+
+
+async def _process_events() -> None:
+    while True:
+        event_id, event_type, project_id, attempt = await _event_queue.get()
+        try:
+            await _apply_event(event_type, project_id)
+            await db_async.finish_stripe_event(event_id, "processed", attempt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            # 4xx (e.g. project deleted) will not succeed on retry
+            permanent = isinstance(e, HTTPException) and e.status_code < 500
+            if permanent or attempt >= STRIPE_EVENT_MAX_ATTEMPTS:
+                print(f"Stripe event {event_id} failed after {attempt} attempt(s): {error}")
+                try:
+                    await db_async.finish_stripe_event(event_id, "failed", attempt, str(error))
+                except Exception:
+                    pass
+            else:
+                delay = STRIPE_EVENT_RETRY_DELAY * 2 ** (attempt - 1)
+                print(f"Stripe event {event_id} failed (attempt {attempt}), retrying in {delay:g}s: {error}")
+                asyncio.get_running_loop().call_later(
+                    delay, _enqueue_event, event_id, event_type, project_id, attempt + 1,
+                    context=db_async.background_context(),
+                )
+        finally:
+            _event_queue.task_done()
+
+
+async def resume_pending_events() -> int:
+    """
+    Re-queue events recorded but not processed before the last shutdown.
+    Called from the app lifespan on startup. Returns the number queued.
+    """
+    events = await db_async.get_pending_stripe_events()
+    for event in events:
+        _remember(event["id"])
+        _enqueue_event(event["id"], event["type"], event.get("project_id"), event.get("attempts", 0) + 1)
+    return len(events)
+
+
+async def stop_event_worker() -> None:
+    """Cancel the worker. Unfinished events stay 'pending' and resume on startup."""
+    global _event_worker
+    if _event_worker is not None:
+        _event_worker.cancel()
+        await asyncio.gather(_event_worker, return_exceptions=True)
+        _event_worker = None
+
+
 @router.post("/webhooks/stripe")
 async def stripe_webhook(request: Request, stripe_signature: str = Header(None)):
     """
     Handle Stripe webhooks to update project status.
+    Acknowledges as soon as the event is recorded; processing is queued.
     """
     payload = await request.body()
 
@@ -91,14 +303,21 @@ async def stripe_webhook(request: Request, stripe_signature: str = Header(None))
     except stripe.error.SignatureVerificationError as e:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    # Handle the event
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        project_id = session.get("metadata", {}).get("project_id")
+    if event['type'] not in HANDLED_EVENT_TYPES:
+        return {"status": "success"}
+
+    # Redelivery of an event this process already accepted
+    event_id = event['id']
+    if _seen(event_id):
+        return {"status": "success"}
+
+    session = event['data']['object']
+    project_id = (session.get("metadata") or {}).get("project_id")
 
-        if project_id:
-            # Update DB
-            db.mark_deposit_paid(project_id)
-            print(f"Payment successful for project {project_id}")
+    # Durable dedupe: a failure here returns 500, so Stripe redelivers
+    is_new = await db_async.record_stripe_event(event_id, event['type'], project_id)
+    _remember(event_id)
+    if is_new:
+        _enqueue_event(event_id, event['type'], project_id)
 
     return {"status": "success"}
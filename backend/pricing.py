@@ -0,0 +1,179 @@
+"""
+VectorWeb Labs - Pricing Engine
+Deterministic implementation of Scout's pricing rules. Computes a quote price
+from project data in microseconds, with no LLM call.
+
+Rules (mirrors SCOUT_SYSTEM_PROMPT):
+    - Base: $500
+    - +$100 per page
+    - Multipliers: 1.5x (E-commerce), 2.0x (Custom/Complex); the highest applies
+    - Student Discount: -20%
+"""
+
+import re
+from typing import Optional
+
+BASE_PRICE = 500
+PRICE_PER_PAGE = 100
+DEFAULT_PAGES = 5  # "Standard 5-page website"
+ECOMMERCE_MULTIPLIER = 1.5
+CUSTOM_MULTIPLIER = 2.0
+STUDENT_DISCOUNT = 0.20
+
+# Bump when the rules above change (invalidates cached quotes)
+RULES_VERSION = "2"
+
+# Phrases, not single generic words: "coffee shop" is not a store, "dashboard" is not a portal
+ECOMMERCE_KEYWORDS = (
+    "e-commerce", "ecommerce", "online store", "online shop", "webshop", "sell products",
+    "sell online", "checkout", "payment gateway", "shopping cart", "shopify",
+)
+CUSTOM_KEYWORDS = (
+    "custom functionality", "custom features", "custom web app", "custom software", "complex",
+    "user accounts", "user login", "member login", "client portal", "customer portal",
+    "membership", "booking system", "crm", "api integration", "marketplace", "saas",
+)
+STUDENT_KEYWORDS = ("i'm a student", "i am a student", "student project", "student discount")
+
+# Discovery answers that map to a deliverable feature
+FEATURE_KEYWORDS = {
+    "contact form": "Contact Form",
+    "live chat": "Live Chat",
+    "blog": "Blog / News",
+    "gallery": "Photo Gallery",
+    "user accounts": "User Accounts",
+    "user login": "User Accounts",
+    "booking": "Online Booking",
+    "payment": "Online Payments",
+    "sell products": "Online Store",
+    "online store": "Online Store",
+    "cms": "Content Management",
+    "email marketing": "Email Marketing Integration",
+    "crm": "CRM Integration",
+}
+
+
+def _matches(text: str, keywords: tuple) -> bool:
+    """Whole-word match, so "custom" does not fire on "customers"."""
+    return any(re.search(rf"\b{re.escape(keyword)}\b", text) for keyword in keywords)
+
+
+# A clause containing one of these is a "we don't need X" answer, not a requirement
+NEGATION_WORDS = ("no", "not", "none", "nothing", "never", "without", "don't", "dont", "n/a")
+
+
+def _scope_values(value) -> list[str]:
+    """String values of an explicit scope field (keys are not requirements)."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [text for item in value.values() for text in _scope_values(item)]
+    if isinstance(value, list):
+        return [text for item in value for text in _scope_values(item)]
+    return []
+
+
+def _affirmative(answer: str) -> str:
+    """The answer without its negated clauses ("None", "No, just a menu page", ...)."""
+    clauses = re.split(r"[,;.\n]|\bbut\b", answer.lower())
+    return " ".join(clause for clause in clauses if not _matches(clause, NEGATION_WORDS))
+
+
+def _scope_text(project: dict) -> str:
+    """
+    What the client says is being built, lowercased: the website type,
+    explicit project_scope values and the discovery answers. Question text
+    is ignored ("Do you need integration with other tools?" is not a
+    requirement), as are negated answer clauses.
+    """
+    parts = [str(project.get("website_type") or "")]
+    parts.extend(_scope_values(project.get("project_scope")))
+    wizard_data = project.get("wizard_data") or {}
+    for item in wizard_data.get("discoveryHistory") or []:
+        if isinstance(item, dict):
+            parts.append(_affirmative(str(item.get("a") or "")))
+    return " ".join(parts).lower()
+
+
+def _page_count(project: dict) -> int:
+    scope = project.get("project_scope") or {}
+    pages = scope.get("pages") if isinstance(scope, dict) else None
+    if isinstance(pages, list):
+        return max(1, len(pages))
+    if isinstance(pages, (int, float)) and pages > 0:
+        return int(pages)
+    return DEFAULT_PAGES
+
+
+def _is_student(project: dict, text: str) -> bool:
+    scope = project.get("project_scope")
+    if isinstance(scope, dict) and isinstance(scope.get("student"), bool):
+        return scope["student"]
+    return _matches(text, STUDENT_KEYWORDS)
+
+
+def estimate(project: dict) -> dict:
+    """
+    Price a project from its scope/wizard data.
+
+    Returns:
+        dict: {
+            "price": int,
+            "pages": int,
+            "multiplier": float,
+            "project_class": "standard" | "e-commerce" | "custom",
+            "student_discount": bool,
+            "features": list[str],
+            "breakdown": list[str]
+        }
+    """
+    text = _scope_text(project)
+    pages = _page_count(project)
+
+    project_class = "standard"
+    multiplier = 1.0
+    if _matches(text, CUSTOM_KEYWORDS):
+        project_class, multiplier = "custom", CUSTOM_MULTIPLIER
+    elif _matches(text, ECOMMERCE_KEYWORDS):
+        project_class, multiplier = "e-commerce", ECOMMERCE_MULTIPLIER
+
+    student = _is_student(project, text)
+
+    subtotal = BASE_PRICE + PRICE_PER_PAGE * pages
+    price = subtotal * multiplier
+    breakdown = [f"Base ${BASE_PRICE}", f"{pages} pages x ${PRICE_PER_PAGE}"]
+    if multiplier != 1.0:
+        breakdown.append(f"{multiplier}x {project_class}")
+    if student:
+        price *= 1 - STUDENT_DISCOUNT
+        breakdown.append(f"-{int(STUDENT_DISCOUNT * 100)}% student discount")
+
+    features = []
+    for keyword, feature in FEATURE_KEYWORDS.items():
+        if _matches(text, (keyword,)) and feature not in features:
+            features.append(feature)
+
+    return {
+        "price": int(round(price)),
+        "pages": pages,
+        "multiplier": multiplier,
+        "project_class": project_class,
+        "student_discount": student,
+        "features": features,
+        "breakdown": breakdown,
+    }
+
+
+def provisional_quote(project: dict, pricing: Optional[dict] = None) -> dict:
+    """
+    A complete quote built only from the rule engine. Used as the instant
+    provisional quote and as the offline/mock-mode quote.
+    """
+    pricing = pricing or estimate(project)
+    return {
+        "price": pricing["price"],
+        "reasoning": "Estimated from standard pricing: " + ", ".join(pricing["breakdown"]) + ".",
+        "features": pricing["features"] or ["Responsive Design", "Contact Form", "SEO Optimization"],
+        "risks": [],
+        "suggested_stack": "Next.js + Tailwind CSS + Supabase",
+    }
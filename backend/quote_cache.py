@@ -0,0 +1,234 @@
+"""
+VectorWeb Labs - Quote Cache
+Content-addressed cache for AI quotes, keyed on a hash of the normalized
+prompt inputs. Tiers: in-memory LRU (always), SQLite file and Redis (optional).
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Any
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:
+    redis_asyncio = None
+
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "3600"))
+QUOTE_CACHE_SIZE = int(os.getenv("QUOTE_CACHE_SIZE", "256"))
+QUOTE_CACHE_PATH = os.getenv("QUOTE_CACHE_PATH")  # e.g. ./quote_cache.sqlite3
+QUOTE_CACHE_REDIS_URL = os.getenv("QUOTE_CACHE_REDIS_URL")
+
+
+def _normalize_text(value: Any) -> str:
+    return " ".join(str(value).split()).lower()
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(_canonical(value).encode()).hexdigest()
+
+
+def normalize_quote_inputs(business_data: dict) -> dict:
+    """
+    Reduce project data to the normalized values that shape the quote prompt.
+    Whitespace/case differences in free text do not produce a new key.
+    """
+    scope = None
+    if business_data.get("project_scope"):
+        scope = business_data["project_scope"]
+    elif business_data.get("wizard_data") and business_data["wizard_data"].get("discoveryHistory"):
+        scope = [
+            {"q": _normalize_text(item.get("q", "")), "a": _normalize_text(item.get("a", ""))}
+            for item in business_data["wizard_data"]["discoveryHistory"]
+        ]
+
+    return {
+        "business_name": _normalize_text(business_data.get("business_name") or "Unknown"),
+        "website_type": _normalize_text(business_data.get("website_type") or "Portfolio"),
+        "target_audience": _normalize_text(business_data.get("target_audience") or "General"),
+        "vibe_style": _normalize_text(business_data.get("vibe_style") or "modern"),
+        "scope": scope,
+    }
+
+
+def cache_key(inputs: dict, namespace: str = "") -> str:
+    """
+    Content address for a set of normalized inputs. `namespace` should change
+    whenever the prompt or model does.
+    """
+    return _digest({"ns": namespace, "inputs": inputs})
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# TIERS
+# ══════════════════════════════════════════════════════════════════════════════
+
+class MemoryTier:
+    """Bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict, ttl: float) -> None:
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class SQLiteTier:
+    """On-disk tier that survives restarts. Queries run in a worker thread."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS quote_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def _get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM quote_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: dict, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO quote_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + ttl),
+            )
+            self._conn.execute("DELETE FROM quote_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM quote_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: dict, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._delete, key)
+
+
+class RedisTier:
+    """Shared tier for multi-worker deployments (any Redis-protocol server)."""
+
+    PREFIX = "vectorweb:quote:"
+
+    def __init__(self, url: str):
+        self._redis = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._redis.get(self.PREFIX + key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: dict, ttl: float) -> None:
+        await self._redis.set(self.PREFIX + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self.PREFIX + key)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CACHE
+# ══════════════════════════════════════════════════════════════════════════════
+
+class QuoteCache:
+    """
+    Read-through over the configured tiers (fastest first). Lower-tier hits
+    are promoted to the tiers above. Bulk invalidation (prompt or pricing
+    rule changes) is done by changing the key namespace, which works across
+    workers and restarts; see ai.QUOTE_CACHE_NAMESPACE.
+    """
+
+    def __init__(self, tiers: list, ttl: float = QUOTE_CACHE_TTL):
+        self.tiers = tiers
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "QuoteCache":
+        tiers: list = [MemoryTier(QUOTE_CACHE_SIZE)]
+        if QUOTE_CACHE_PATH:
+            tiers.append(SQLiteTier(QUOTE_CACHE_PATH))
+        if QUOTE_CACHE_REDIS_URL:
+            if redis_asyncio is None:
+                print("QUOTE_CACHE_REDIS_URL is set but the 'redis' package is not installed; skipping Redis tier")
+            else:
+                tiers.append(RedisTier(QUOTE_CACHE_REDIS_URL))
+        return cls(tiers)
+
+    async def get(self, key: str) -> Optional[dict]:
+        for i, tier in enumerate(self.tiers):
+            try:
+                value = await tier.get(key)
+            except Exception as e:
+                print(f"Quote cache read error ({type(tier).__name__}): {e}")
+                continue
+            if value is not None:
+                for upper in self.tiers[:i]:
+                    try:
+                        await upper.set(key, value, self.ttl)
+                    except Exception as e:
+                        # Still a hit: the value came from a lower tier
+                        print(f"Quote cache promote error ({type(upper).__name__}): {e}")
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: dict) -> None:
+        for tier in self.tiers:
+            try:
+                await tier.set(key, value, self.ttl)
+            except Exception as e:
+                print(f"Quote cache write error ({type(tier).__name__}): {e}")
+
+    async def invalidate(self, key: str) -> None:
+        for tier in self.tiers:
+            try:
+                await tier.delete(key)
+            except Exception as e:
+                print(f"Quote cache delete error ({type(tier).__name__}): {e}")
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "tiers": [type(t).__name__ for t in self.tiers]}
+
+
+quote_cache = QuoteCache.from_env()
@@ -0,0 +1,127 @@
+"""
+Local JWT verification checks: only unexpired tokens signed with a
+published key, for our audience, are accepted, and a rejected token never
+falls through to Supabase Auth.
+
+Signs tokens with throwaway RSA keys served as a fake JWKS; no network.
+
+Run: python -m pytest backend/test_auth.py
+"""
+
+import sys
+import os
+import json
+import time
+import asyncio
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import dependencies
+
+KID = "key-1"
+SIGNING_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+OTHER_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _jwks() -> dict:
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(SIGNING_KEY.public_key()))
+    return {"keys": [{**jwk, "kid": KID, "alg": "RS256", "use": "sig"}]}
+
+
+def _token(key=SIGNING_KEY, kid=KID, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "aud": dependencies.SUPABASE_JWT_AUDIENCE,
+        "exp": int(time.time()) + 300,
+        **claims,
+    }
+    return jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture(autouse=True)
+def local_auth(monkeypatch):
+    refreshes = []
+
+    async def fake_refresh():
+        refreshes.append(time.time())
+        keys = {jwk.key_id: jwk for jwk in jwt.PyJWKSet.from_dict(_jwks()).keys}
+        monkeypatch.setattr(dependencies, "_jwks_keys", keys)
+        monkeypatch.setattr(dependencies, "_jwks_fetched_at", time.time())
+
+    async def no_remote(token):
+        raise AssertionError("rejected tokens must not fall back to Supabase Auth")
+
+    monkeypatch.setattr(dependencies, "AUTH_MODE", "local")
+    monkeypatch.setattr(dependencies, "_refresh_jwks", fake_refresh)
+    monkeypatch.setattr(dependencies, "_verify_remote", no_remote)
+    monkeypatch.setattr(dependencies, "_jwks_keys", {})
+    monkeypatch.setattr(dependencies, "_jwks_fetched_at", 0.0)
+    monkeypatch.setattr(dependencies, "_user_cache", dependencies.OrderedDict())
+    return refreshes
+
+
+def _authenticate(token: str):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(dependencies.get_current_user(credentials))
+
+
+def _assert_rejected(token: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        _authenticate(token)
+    assert error.value.status_code == 401
+
+
+def test_valid_token_is_accepted_and_cached(local_auth):
+    token = _token()
+    assert _authenticate(token).id == "user-1"
+    assert _authenticate(token).id == "user-1"
+    assert len(local_auth) == 1
+
+
+def test_expired_token_is_rejected():
+    _assert_rejected(_token(exp=int(time.time()) - 10))
+
+
+def test_token_signed_with_the_wrong_key_is_rejected():
+    _assert_rejected(_token(key=OTHER_KEY))
+
+
+def test_token_for_another_audience_is_rejected():
+    _assert_rejected(_token(aud="some-other-app"))
+
+
+def test_token_without_subject_is_rejected():
+    token = jwt.encode(
+        {"aud": dependencies.SUPABASE_JWT_AUDIENCE, "exp": int(time.time()) + 300},
+        SIGNING_KEY, algorithm="RS256", headers={"kid": KID},
+    )
+    _assert_rejected(token)
+
+
+def test_unknown_key_id_is_rejected_after_one_refresh(local_auth):
+    _assert_rejected(_token(kid="rotated-away"))
+    _assert_rejected(_token(kid="rotated-away"))
+    assert len(local_auth) == 1  # refetches are rate limited
+
+
+def test_hs256_token_with_the_wrong_secret_is_rejected(monkeypatch):
+    monkeypatch.setattr(dependencies, "SUPABASE_JWT_SECRET", "the-real-secret-with-enough-bytes!")
+    payload = {"sub": "user-1", "aud": dependencies.SUPABASE_JWT_AUDIENCE, "exp": int(time.time()) + 300}
+
+    assert _authenticate(jwt.encode(payload, "the-real-secret-with-enough-bytes!", algorithm="HS256")).id == "user-1"
+    _assert_rejected(jwt.encode(payload, "a-guessed-secret-with-enough-bytes", algorithm="HS256"))
+
+
+def test_cached_user_expires_with_the_token(monkeypatch):
+    monkeypatch.setattr(dependencies, "AUTH_CACHE_TTL", 3600)
+    token = _token(exp=int(time.time()) + 1)
+    _authenticate(token)
+    expires_at, _ = dependencies._user_cache[dependencies._token_key(token)]
+    assert expires_at <= time.time() + 1
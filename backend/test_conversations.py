@@ -0,0 +1,76 @@
+"""
+Conversation store checks: concurrent turns in one conversation are all
+kept, in memory and across processes sharing the SQLite backend.
+
+Run: python -m pytest backend/test_conversations.py
+"""
+
+import sys
+import os
+import asyncio
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import conversations
+from conversations import ConversationStore, SQLiteBackend
+
+
+def _turn(n: int) -> list[dict]:
+    return [{"role": "user", "content": f"q{n}"}, {"role": "assistant", "content": f"a{n}"}]
+
+
+def test_concurrent_turns_are_all_kept_in_memory():
+    store = ConversationStore()
+
+    async def run():
+        await asyncio.gather(*(store.append("c1", _turn(n)) for n in range(5)))
+        return await store.get("c1")
+
+    history = asyncio.run(run())
+    assert sorted(m["content"] for m in history if m["role"] == "user") == [f"q{n}" for n in range(5)]
+    assert len(history) == 10
+
+
+def test_seed_only_starts_a_new_conversation():
+    store = ConversationStore()
+    seed = [{"role": "user", "content": "from client"}]
+
+    async def run():
+        await store.append("c1", _turn(1), seed=seed)
+        await store.append("c1", _turn(2), seed=seed)
+        return await store.get("c1")
+
+    assert [m["content"] for m in asyncio.run(run())] == ["from client", "q1", "a1", "q2", "a2"]
+
+
+def test_workers_sharing_sqlite_keep_each_others_turns(tmp_path):
+    path = str(tmp_path / "conversations.sqlite3")
+    worker_a = ConversationStore(SQLiteBackend(path))
+    worker_b = ConversationStore(SQLiteBackend(path))
+
+    async def run():
+        await worker_a.append("c1", _turn(0))
+        await asyncio.gather(
+            *(worker_a.append("c1", _turn(n)) for n in range(1, 4)),
+            *(worker_b.append("c1", _turn(n)) for n in range(4, 7)),
+        )
+        return await ConversationStore(SQLiteBackend(path)).get("c1")
+
+    history = asyncio.run(run())
+    assert sorted(m["content"] for m in history if m["role"] == "user") == [f"q{n}" for n in range(7)]
+
+
+def test_long_history_is_compacted(monkeypatch):
+    monkeypatch.setattr(conversations, "VECTORBOT_HISTORY_MAX_MESSAGES", 8)
+    monkeypatch.setattr(conversations, "VECTORBOT_HISTORY_KEEP_MESSAGES", 6)
+    store = ConversationStore()
+
+    async def run():
+        for n in range(5):
+            stored = await store.append("c1", _turn(n))
+        return stored
+
+    stored = asyncio.run(run())
+    assert stored[-1]["content"] == "a4"
+    assert len(stored) <= 8
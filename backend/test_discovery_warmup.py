@@ -0,0 +1,57 @@
+"""
+Discovery warm-up checks: the warm-up must actually fill the shared cache,
+while questions naming a real client stay out of it.
+
+Run: python -m pytest backend/test_discovery_warmup.py
+"""
+
+import sys
+import os
+import json
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import ai
+import discovery_warmup
+from discovery_cache import DiscoveryCache, names_client
+
+
+def _question(text: str) -> dict:
+    return {"question": text, "options": ["Leads", "Sales"], "allow_multiple": False, "is_complete": False}
+
+
+def _run_warmup(depth: int) -> DiscoveryCache:
+    cache = DiscoveryCache()
+
+    async def fake_llm(system_prompt, user_prompt, task="default"):
+        step = json.loads(user_prompt.split("Previous Answers: ")[1].split("\n</client_data>")[0])
+        return json.dumps(_question(f"What is the main goal for your business at step {len(step) + 1}?"))
+
+    saved = (ai.discovery_cache, discovery_warmup.discovery_cache, ai._call_openrouter_async, ai.async_client)
+    ai.discovery_cache = discovery_warmup.discovery_cache = cache
+    ai._call_openrouter_async = fake_llm
+    ai.async_client = object()  # any non-None client: the LLM call itself is faked
+    try:
+        asyncio.run(discovery_warmup.warm_industry("modern web", depth, branching=2, concurrency=4))
+    finally:
+        ai.discovery_cache, discovery_warmup.discovery_cache, ai._call_openrouter_async, ai.async_client = saved
+    return cache
+
+
+def test_warmup_fills_cache():
+    cache = _run_warmup(depth=3)
+    assert cache.stats()["entries"] == 1 + 2 + 4
+    assert cache.get("modern web", 0, []) is not None
+
+
+def test_real_names_are_matched_as_whole_words():
+    assert names_client("Neon Sushi", _question("What does Neon Sushi sell?"))
+    assert names_client("Café Luna", _question("Who visits Café Luna?"))
+    assert not names_client("Sushi", _question("Do you serve sushiburritos?"))
+    assert not names_client("Your Business", _question("What is the goal of your business?"))
+
+
+def test_short_names_do_not_disable_caching():
+    assert not names_client("A", _question("Do you need a contact form?"))
+    assert not names_client("Co", _question("Do you need a co-working booking page?"))
+
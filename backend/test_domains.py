@@ -0,0 +1,146 @@
+"""
+Domain engine checks: availability caching with separate TTLs for free and
+taken names, per-TLD rate limiting, and no speculative WHOIS traffic.
+
+WHOIS and the LLM are replaced with in-process fakes; no network.
+
+Run: python -m pytest backend/test_domains.py
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import ai
+import domains
+
+TAKEN = {"taken.com"}
+
+
+@pytest.fixture
+def whois_calls(monkeypatch):
+    calls = []
+
+    def fake_whois(domain):
+        calls.append(domain)
+        return {"available": domain not in TAKEN, "domain": domain}
+
+    async def fake_ideas(domain, vibe, count=3):
+        return []
+
+    monkeypatch.setattr(domains, "_whois_availability", fake_whois)
+    monkeypatch.setattr(ai, "generate_domain_ideas_async", fake_ideas)
+    monkeypatch.setattr(domains, "_availability_cache", {})
+    monkeypatch.setattr(domains, "_limiter", domains._RegistryLimiter(4, 0.0))
+    return calls
+
+
+def test_repeat_lookup_is_served_from_cache(whois_calls):
+    async def run():
+        first = await domains.lookup_availability("Fresh.com")
+        second = await domains.lookup_availability("fresh.com")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert whois_calls == ["fresh.com"]
+    assert "cached" not in first
+    assert second["cached"] is True
+
+
+def test_free_and_taken_answers_use_their_own_ttl(whois_calls, monkeypatch):
+    monkeypatch.setattr(domains, "DOMAIN_CACHE_AVAILABLE_TTL", 300)
+    monkeypatch.setattr(domains, "DOMAIN_CACHE_TAKEN_TTL", 86400)
+
+    async def run():
+        await domains.lookup_availability("fresh.com")
+        await domains.lookup_availability("taken.com")
+
+    asyncio.run(run())
+    now = time.time()
+    assert domains._availability_cache["fresh.com"][0] == pytest.approx(now + 300, abs=5)
+    assert domains._availability_cache["taken.com"][0] == pytest.approx(now + 86400, abs=5)
+
+
+def test_expired_entry_is_looked_up_again(whois_calls, monkeypatch):
+    monkeypatch.setattr(domains, "DOMAIN_CACHE_AVAILABLE_TTL", 0.05)
+
+    async def run():
+        await domains.lookup_availability("fresh.com")
+        await asyncio.sleep(0.1)
+        return await domains.lookup_availability("fresh.com")
+
+    assert "cached" not in asyncio.run(run())
+    assert whois_calls == ["fresh.com", "fresh.com"]
+
+
+def test_unverified_answers_are_not_cached(whois_calls, monkeypatch):
+    def flaky_whois(domain):
+        whois_calls.append(domain)
+        return {"available": True, "domain": domain, "warning": "Could not verify: timeout"}
+
+    monkeypatch.setattr(domains, "_whois_availability", flaky_whois)
+
+    async def run():
+        await domains.lookup_availability("fresh.com")
+        await domains.lookup_availability("fresh.com")
+
+    asyncio.run(run())
+    assert whois_calls == ["fresh.com", "fresh.com"]
+
+
+def test_registry_limiter_caps_concurrency_per_tld(monkeypatch):
+    monkeypatch.setattr(domains, "_availability_cache", {})
+    monkeypatch.setattr(domains, "_limiter", domains._RegistryLimiter(2, 0.0))
+    lock = threading.Lock()
+    active = {"com": 0, "io": 0}
+    peak = {"com": 0, "io": 0}
+
+    def slow_whois(domain):
+        tld = domain.rsplit(".", 1)[-1]
+        with lock:
+            active[tld] += 1
+            peak[tld] = max(peak[tld], active[tld])
+        time.sleep(0.05)
+        with lock:
+            active[tld] -= 1
+        return {"available": True, "domain": domain}
+
+    monkeypatch.setattr(domains, "_whois_availability", slow_whois)
+    names = [f"name{i}.com" for i in range(6)] + [f"name{i}.io" for i in range(6)]
+    asyncio.run(domains.bulk_check(names))
+    assert peak == {"com": 2, "io": 2}
+
+
+def test_registry_limiter_spaces_out_starts():
+    limiter = domains._RegistryLimiter(10, 0.05)
+    starts = []
+
+    async def lookup():
+        async with limiter.slot("com"):
+            starts.append(time.monotonic())
+
+    async def run():
+        await asyncio.gather(*(lookup() for _ in range(3)))
+
+    asyncio.run(run())
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert all(gap >= 0.04 for gap in gaps)
+
+
+def test_free_domain_costs_one_whois_query(whois_calls):
+    result = asyncio.run(domains.check_availability("fresh.com"))
+    assert result["available"] is True
+    assert result["suggestions"] == []
+    assert whois_calls == ["fresh.com"]
+
+
+def test_taken_domain_gets_verified_suggestions(whois_calls):
+    result = asyncio.run(domains.check_availability("taken.com"))
+    assert result["available"] is False
+    assert result["suggestions"]
+    assert set(result["suggestions"]) <= set(whois_calls) - TAKEN
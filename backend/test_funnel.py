@@ -15,7 +15,7 @@ class Colors:
     BOLD = '\033[1m'
 
 # Monkey patch _call_openrouter to avoid real API calls and verify logic
-def mock_call_openrouter(system_prompt, user_prompt):
+def mock_call_openrouter(system_prompt, user_prompt, task="default"):
     # Extract phase from system prompt for verification
     if "PHASE 1" in system_prompt:
         print(f"{Colors.BLUE}   -> Verified Prompt Phase: 1 (Identity & Goals){Colors.ENDC}")
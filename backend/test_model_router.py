@@ -0,0 +1,103 @@
+"""
+Model router checks: hedging after the delay, first success wins,
+failover on errors, and what ends up in the latency window.
+
+Run: python -m pytest backend/test_model_router.py
+"""
+
+import sys
+import os
+import asyncio
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from model_router import ModelRouter
+
+
+def _router(hedge_delay: str = "0.05") -> ModelRouter:
+    return ModelRouter({"default": ["slow", "fast"]}, hedge_delay=hedge_delay)
+
+
+def test_hedge_fires_after_delay_and_first_success_wins():
+    router = _router()
+    started = []
+    cancelled = []
+
+    async def call(model):
+        started.append(model)
+        try:
+            await asyncio.sleep(1 if model == "slow" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(model)
+            raise
+        return model
+
+    async def run():
+        result = await router.run("default", call)
+        await asyncio.sleep(0)  # let the loser's cancellation land
+        return result
+
+    assert asyncio.run(run()) == "fast"
+    assert started == ["slow", "fast"]
+    assert cancelled == ["slow"]
+    assert router.hedges == 1
+    assert router.failovers == 0
+
+
+def test_no_hedge_when_primary_answers_in_time():
+    router = _router(hedge_delay="1")
+    started = []
+
+    async def call(model):
+        started.append(model)
+        return model
+
+    assert asyncio.run(router.run("default", call)) == "slow"
+    assert started == ["slow"]
+    assert router.hedges == 0
+
+
+def test_cancelled_loser_is_not_a_latency_sample():
+    router = _router()
+
+    async def call(model):
+        await asyncio.sleep(1 if model == "slow" else 0.01)
+        return model
+
+    asyncio.run(router.run("default", call))
+    stats = router.stats()["models"]
+    assert stats["slow"]["samples"] == 0
+    assert stats["slow"]["hedge_losses"] == 1
+    assert stats["fast"]["samples"] == 1
+
+
+def test_error_fails_over_to_next_model():
+    router = _router(hedge_delay="0")
+
+    async def call(model):
+        if model == "slow":
+            raise RuntimeError("upstream 500")
+        return model
+
+    assert asyncio.run(router.run("default", call)) == "fast"
+    assert router.failovers == 1
+    assert router.stats()["models"]["slow"]["error_rate"] == 1.0
+
+
+def test_every_model_failing_reraises_the_last_error():
+    router = _router(hedge_delay="0")
+
+    async def call(model):
+        raise RuntimeError(f"{model} down")
+
+    with pytest.raises(RuntimeError, match="fast down"):
+        asyncio.run(router.run("default", call))
+
+
+def test_failing_model_moves_to_the_back():
+    router = _router()
+    for _ in range(5):
+        router.record("slow", 0.1, ok=False)
+        router.record("fast", 0.5, ok=True)
+    assert router.candidates("default") == ["fast", "slow"]
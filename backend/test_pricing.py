@@ -0,0 +1,70 @@
+"""
+Pricing engine checks: multipliers must come from what the client asked
+for, not from the wording of the questions or from "no" answers.
+
+Run: python -m pytest backend/test_pricing.py
+"""
+
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import pricing
+
+
+def _project(*answers, **fields) -> dict:
+    history = [{"q": q, "a": a} for q, a in answers]
+    return {"wizard_data": {"discoveryHistory": history}, **fields}
+
+
+def test_negative_answer_to_integration_question_is_standard():
+    quote = pricing.estimate(_project(("Do you need integration with other tools?", "None")))
+    assert quote["project_class"] == "standard"
+    assert quote["price"] == 1000
+
+
+def test_negative_answers_are_ignored():
+    for answer in ("No", "No, just a menu page", "Not needed", "We don't need user accounts", "n/a"):
+        quote = pricing.estimate(_project(("Do users need to log in (user accounts, client portal)?", answer)))
+        assert quote["project_class"] == "standard", answer
+        assert "User Accounts" not in quote["features"], answer
+
+
+def test_question_text_is_not_a_requirement():
+    quote = pricing.estimate(_project(("Will you sell online with a shopping cart?", "Maybe later, not now")))
+    assert quote["multiplier"] == 1.0
+
+
+def test_coffee_shop_is_not_ecommerce():
+    quote = pricing.estimate(_project(("What does your business do?", "We run a coffee shop downtown"),
+                                      website_type="coffee shop"))
+    assert quote["project_class"] == "standard"
+
+
+def test_generic_words_do_not_trigger_custom():
+    quote = pricing.estimate(_project(
+        ("Anything else?", "An admin dashboard to edit the menu, and an API for our POS would be nice"),
+        ("How do customers reach you?", "Login to Instagram and DM us"),
+    ))
+    assert quote["project_class"] == "standard"
+
+
+def test_affirmative_answers_still_apply():
+    quote = pricing.estimate(_project(("Do you sell products?", "Yes, we want an online store with checkout")))
+    assert quote["project_class"] == "e-commerce"
+    assert quote["price"] == 1500
+
+    quote = pricing.estimate(_project(("Do users need accounts?", "No blog, but we need user accounts")))
+    assert quote["project_class"] == "custom"
+    assert quote["features"] == ["User Accounts"]
+
+
+def test_explicit_scope_values_count_but_keys_do_not():
+    assert pricing.estimate({"project_scope": {"type": "marketplace"}})["project_class"] == "custom"
+    assert pricing.estimate({"project_scope": {"checkout": False, "pages": 3}})["project_class"] == "standard"
+
+
+def test_negated_student_mention():
+    assert not pricing.estimate(_project(("Anything else?", "I'm not a student")))["student_discount"]
+    assert pricing.estimate(_project(("Anything else?", "I'm a student")))["student_discount"]
+
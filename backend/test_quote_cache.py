@@ -0,0 +1,46 @@
+"""
+Quote cache checks: a cached quote must never carry a price the pricing
+engine would not give the project asking for it.
+
+Run: python -m pytest backend/test_quote_cache.py
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import ai
+from quote_cache import MemoryTier, QuoteCache
+
+
+def _project(answer: str) -> dict:
+    return {
+        "business_name": "Bean There",
+        "project_scope": {"pages": 5},
+        "wizard_data": {"discoveryHistory": [{"q": "Do you sell products?", "a": answer}]},
+    }
+
+
+def test_same_scope_different_answers_are_priced_separately(monkeypatch):
+    calls = []
+
+    async def fake_call(system_prompt, user_prompt, task="default"):
+        calls.append(user_prompt)
+        return '{"reasoning": "ok", "features": [], "risks": [], "suggested_stack": "Next.js"}'
+
+    monkeypatch.setattr(ai, "get_async_client", lambda: object())
+    monkeypatch.setattr(ai, "_call_openrouter_async", fake_call)
+    monkeypatch.setattr(ai, "quote_cache", QuoteCache([MemoryTier(16)]))
+
+    async def run():
+        plain = await ai.generate_quote_async(_project("No, just a menu"))
+        shop = await ai.generate_quote_async(_project("Yes, an online store with checkout"))
+        plain_again = await ai.generate_quote_async(_project("No, just a menu"))
+        return plain, shop, plain_again
+
+    plain, shop, plain_again = asyncio.run(run())
+    assert plain["price"] == 1000
+    assert shop["price"] == 1500
+    assert plain_again["price"] == 1000
+    assert len(calls) == 2
@@ -0,0 +1,99 @@
+"""
+Single-flight checks for ai._call_openrouter_async: identical concurrent
+calls share one upstream request, which is cancelled once nobody waits.
+
+Run: python -m pytest backend/test_single_flight.py
+"""
+
+import sys
+import os
+import asyncio
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import ai
+from model_router import ModelRouter
+
+
+class FakeUpstream:
+    """Stands in for _request_completion; each call blocks until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, messages, model, title="VectorWeb Labs"):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"answer from {model}"
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(ai, "_request_completion", fake)
+    monkeypatch.setattr(ai, "model_router", ModelRouter({"default": ["model-a"]}, hedge_delay="0"))
+    monkeypatch.setattr(ai, "_inflight", {})
+    monkeypatch.setattr(ai, "_waiters", {})
+    return fake
+
+
+def test_concurrent_callers_share_one_upstream_call(upstream):
+    async def run():
+        callers = [asyncio.create_task(ai._call_openrouter_async("sys", "same prompt")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        upstream.release.set()
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(run()) == ["answer from model-a", "answer from model-a"]
+    assert upstream.calls == 1
+    assert not ai._inflight
+
+
+def test_different_prompts_are_not_coalesced(upstream):
+    async def run():
+        upstream.release.set()
+        return await asyncio.gather(
+            ai._call_openrouter_async("sys", "first"),
+            ai._call_openrouter_async("sys", "second"),
+        )
+
+    asyncio.run(run())
+    assert upstream.calls == 2
+
+
+def test_cancelling_one_caller_keeps_the_request_for_the_other(upstream):
+    async def run():
+        first = asyncio.create_task(ai._call_openrouter_async("sys", "prompt"))
+        second = asyncio.create_task(ai._call_openrouter_async("sys", "prompt"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        upstream.release.set()
+        return await second
+
+    assert asyncio.run(run()) == "answer from model-a"
+    assert upstream.calls == 1
+    assert upstream.cancelled == 0
+
+
+def test_cancelling_the_last_caller_cancels_the_upstream_call(upstream):
+    async def run():
+        callers = [asyncio.create_task(ai._call_openrouter_async("sys", "prompt")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert upstream.calls == 1
+    assert upstream.cancelled == 1
+    assert not ai._inflight
+    assert not ai._waiters
@@ -0,0 +1,177 @@
+"""
+Write-behind buffer checks: bursts of wizard updates coalesce into one
+write, ownership is still enforced, and reads never miss buffered data.
+
+Uses an in-memory stand-in for the owner-scoped update RPC; no database
+is contacted.
+
+Run: python -m pytest backend/test_write_buffer.py
+"""
+
+import sys
+import os
+import asyncio
+import types
+
+import pytest
+from fastapi import HTTPException
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import db_async
+from write_buffer import WriteBuffer
+
+OWNER = "owner-1"
+PROJECT = "project-1"
+
+
+class FakeProjects:
+    """Owner-scoped project rows, like the update_project_owned RPC."""
+
+    def __init__(self):
+        self.rows = {PROJECT: {
+            "id": PROJECT, "user_id": OWNER, "business_name": "Bean There",
+            "vibe_style": "modern", "domain_choice": "", "wizard_step": 1,
+        }}
+        self.writes: list[dict] = []
+        self.refused_fields: set[str] = set()
+
+    async def update_project_owned(self, project_id, user_id, data):
+        row = self.rows.get(project_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        if row["user_id"] != user_id:
+            raise HTTPException(status_code=403, detail="Unauthorized")
+        if self.refused_fields & set(data):
+            raise HTTPException(status_code=422, detail="Invalid project data")
+        self.writes.append(dict(data))
+        row.update(data)
+        return dict(row)
+
+    async def get_project(self, project_id):
+        row = self.rows.get(project_id)
+        return dict(row) if row else None
+
+
+@pytest.fixture
+def projects(monkeypatch):
+    fake = FakeProjects()
+    monkeypatch.setattr(db_async, "update_project_owned", fake.update_project_owned)
+    monkeypatch.setattr(db_async, "get_project", fake.get_project)
+    return fake
+
+
+def test_burst_is_coalesced_into_one_write(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+
+    async def run():
+        await buffer.update(PROJECT, OWNER, {"business_name": "B"})
+        await buffer.update(PROJECT, OWNER, {"business_name": "Be"})
+        view = await buffer.update(PROJECT, OWNER, {"business_name": "Bean", "domain_choice": "bean.com"})
+        assert view["business_name"] == "Bean"
+        assert len(projects.writes) == 1  # only the write-through
+        await buffer.flush(PROJECT)
+
+    asyncio.run(run())
+    assert projects.writes == [
+        {"business_name": "B"},
+        {"business_name": "Bean", "domain_choice": "bean.com"},
+    ]
+    assert buffer.stats()["coalesced"] == 2
+
+
+def test_step_change_is_written_immediately(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+
+    async def run():
+        await buffer.update(PROJECT, OWNER, {"business_name": "Bean"})
+        await buffer.update(PROJECT, OWNER, {"wizard_step": 2})
+
+    asyncio.run(run())
+    assert projects.rows[PROJECT]["wizard_step"] == 2
+    assert len(projects.writes) == 2
+
+
+def test_other_owner_gets_403_and_buffered_data_is_kept(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+
+    async def run():
+        await buffer.update(PROJECT, OWNER, {"business_name": "Bean"})
+        await buffer.update(PROJECT, OWNER, {"domain_choice": "bean.com"})
+        with pytest.raises(HTTPException) as error:
+            await buffer.update(PROJECT, "someone-else", {"business_name": "Mine now"})
+        assert error.value.status_code == 403
+        await buffer.flush(PROJECT)
+
+    asyncio.run(run())
+    assert projects.rows[PROJECT]["business_name"] == "Bean"
+    assert projects.rows[PROJECT]["domain_choice"] == "bean.com"
+
+
+def test_unknown_project_gets_404(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(buffer.update("missing", OWNER, {"business_name": "Bean"}))
+    assert error.value.status_code == 404
+
+
+def test_reads_see_buffered_updates(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+
+    async def run():
+        await buffer.update(PROJECT, OWNER, {"business_name": "Bean"})
+        await buffer.update(PROJECT, OWNER, {"domain_choice": "bean.com"})
+        stored = await db_async.get_project(PROJECT)
+        assert stored["domain_choice"] == ""
+        return buffer.overlay(PROJECT, stored)
+
+    assert asyncio.run(run())["domain_choice"] == "bean.com"
+
+
+def test_finalize_flushes_before_reading_the_project(projects, monkeypatch):
+    import main
+
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+    monkeypatch.setattr(main, "write_buffer", buffer)
+    quoted = []
+
+    async def fake_quote_and_save(project_id, user_id, project, extra=None, job=None, force_refresh=False):
+        quoted.append(project)
+        return project
+
+    monkeypatch.setattr(main, "_quote_and_save", fake_quote_and_save)
+
+    async def run():
+        await buffer.update(PROJECT, OWNER, {"business_name": "Bean"})
+        await buffer.update(PROJECT, OWNER, {"domain_choice": "bean.com"})
+        await main.finalize_project(PROJECT, user=types.SimpleNamespace(id=OWNER))
+
+    asyncio.run(run())
+    assert quoted[0]["domain_choice"] == "bean.com"
+
+
+def test_rejected_field_is_dropped_and_reported(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+    projects.refused_fields = {"domain_choice"}
+
+    async def run():
+        await buffer.update(PROJECT, OWNER, {"business_name": "B"})
+        await buffer.update(PROJECT, OWNER, {"business_name": "Bean", "domain_choice": "bad"})
+        await buffer.flush(PROJECT)
+        return await buffer.update(PROJECT, OWNER, {"wizard_step": 2})
+
+    row = asyncio.run(run())
+    assert projects.rows[PROJECT]["business_name"] == "Bean"
+    assert "domain_choice" in row["rejected_fields"]
+    assert buffer.stats()["rejected"] == 1
+
+
+def test_invalid_values_are_refused_before_buffering(projects):
+    buffer = WriteBuffer(debounce=10, max_delay=10)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(buffer.update(PROJECT, OWNER, {"vibe_style": "neon"}))
+    assert error.value.status_code == 422
+    assert projects.writes == []
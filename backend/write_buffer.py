@@ -0,0 +1,231 @@
+"""
+VectorWeb Labs - Wizard Write-Behind Buffer
+Coalesces the wizard's frequent small PATCHes per project in memory and
+writes them to the database in one UPDATE after a short quiet period.
+
+Flushes happen:
+    - WRITE_BUFFER_DEBOUNCE seconds after the last update
+    - at most WRITE_BUFFER_MAX_DELAY seconds after the first unflushed update
+    - immediately when wizard_step changes (step transitions)
+    - on demand (finalize/quote, delta writes) and on shutdown
+
+The first update of a burst is written through, which verifies ownership
+and gives the baseline row; later updates in the burst are buffered.
+
+A flush the database rejects (422, e.g. a constraint violation) is retried
+field by field so the valid fields still land; rejected fields are dropped,
+logged and reported in the next PATCH response as `rejected_fields`. Other
+failures are retried up to WRITE_BUFFER_MAX_RETRIES times, then treated the
+same way.
+"""
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+from fastapi import HTTPException
+
+import db_async
+
+WRITE_BUFFER_DEBOUNCE = float(os.getenv("WRITE_BUFFER_DEBOUNCE", "2"))  # 0 disables buffering
+WRITE_BUFFER_MAX_DELAY = float(os.getenv("WRITE_BUFFER_MAX_DELAY", "10"))
+WRITE_BUFFER_MAX_RETRIES = int(os.getenv("WRITE_BUFFER_MAX_RETRIES", "3"))
+
+# Checked before buffering, since a buffered write's errors can't reach the request
+VIBE_STYLES = ("modern", "classic", "bold")  # projects.vibe_style CHECK (migration 0001)
+NOT_NULL_FIELDS = ("business_name", "vibe_style", "domain_choice")
+
+# Rejections waiting to be reported, bounded so abandoned projects don't pile up
+MAX_REPORTED_PROJECTS = 1000
+
+
+def validate_update(data: dict) -> None:
+    """Raise 422 for values the projects table is known to refuse."""
+    for field in NOT_NULL_FIELDS:
+        if field in data and data[field] is None:
+            raise HTTPException(status_code=422, detail=f"{field} cannot be null")
+    if "vibe_style" in data and data["vibe_style"] not in VIBE_STYLES:
+        raise HTTPException(status_code=422, detail=f"vibe_style must be one of {', '.join(VIBE_STYLES)}")
+    if "wizard_step" in data and data["wizard_step"] is not None and not isinstance(data["wizard_step"], int):
+        raise HTTPException(status_code=422, detail="wizard_step must be an integer")
+
+
+class _Entry:
+    def __init__(self, user_id: str, row: dict):
+        self.user_id = user_id
+        self.row = row  # last row written
+        self.pending: dict = {}
+        self.failures = 0  # consecutive failed flushes
+        self.first_pending_at: Optional[float] = None
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.lock = asyncio.Lock()
+
+
+class WriteBuffer:
+    """Per-project write-behind buffer for owner-scoped project updates."""
+
+    def __init__(self, debounce: float = WRITE_BUFFER_DEBOUNCE, max_delay: float = WRITE_BUFFER_MAX_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.writes = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self._entries: dict[str, _Entry] = {}
+        self._rejections: "OrderedDict[str, dict[str, str]]" = OrderedDict()
+        self._flushes: set[asyncio.Task] = set()
+
+    async def update(self, project_id: str, user_id: str, data: dict) -> dict:
+        """
+        Apply `data` to the project and return the project as the user now
+        sees it. Raises 404/403/422 like db_async.update_project_owned.
+        Fields dropped from earlier buffered writes are reported once, under
+        `rejected_fields`.
+        """
+        validate_update(data)
+        return self._report_rejections(project_id, await self._update(project_id, user_id, data))
+
+    async def _update(self, project_id: str, user_id: str, data: dict) -> dict:
+        entry = self._entries.get(project_id)
+        if entry is None or entry.user_id != user_id or self.debounce <= 0:
+            row = await db_async.update_project_owned(project_id, user_id, data)
+            self.writes += 1
+            if self.debounce > 0:
+                self._entries.setdefault(project_id, _Entry(user_id, row))
+                self._schedule(project_id, self._entries[project_id])
+            return row
+
+        step_changed = "wizard_step" in data and data["wizard_step"] != self._view(entry).get("wizard_step")
+        entry.pending.update(data)
+        self.coalesced += 1
+        if entry.first_pending_at is None:
+            entry.first_pending_at = time.monotonic()
+
+        if step_changed:
+            await self.flush(project_id)
+            entry = self._entries.get(project_id, entry)
+        else:
+            self._schedule(project_id, entry)
+        return self._view(entry)
+
+    def overlay(self, project_id: str, row: Optional[dict]) -> Optional[dict]:
+        """Merge unflushed updates into a row read from the database."""
+        entry = self._entries.get(project_id)
+        if row is None or entry is None or not entry.pending:
+            return row
+        return {**row, **{k: v for k, v in entry.pending.items() if k in row}}
+
+    async def flush(self, project_id: str) -> None:
+        """Write any pending updates for the project now."""
+        entry = self._entries.get(project_id)
+        if entry is None:
+            return
+        async with entry.lock:
+            if entry.timer:
+                entry.timer.cancel()
+                entry.timer = None
+            data, entry.pending, entry.first_pending_at = entry.pending, {}, None
+            if data:
+                try:
+                    entry.row = await db_async.update_project_owned(project_id, entry.user_id, data)
+                    self.writes += 1
+                    entry.failures = 0
+                except HTTPException as e:
+                    if e.status_code in (403, 404):
+                        print(f"Dropping buffered update for {project_id}: {e.detail}")
+                        self._entries.pop(project_id, None)
+                        return
+                    entry.failures += 1
+                    if e.status_code >= 500 and entry.failures < WRITE_BUFFER_MAX_RETRIES:
+                        # Keep the data (newer updates win) and retry on the next trigger
+                        entry.pending = {**data, **entry.pending}
+                        entry.first_pending_at = time.monotonic()
+                        self._schedule(project_id, entry)
+                        raise
+                    # Permanent (or retried out): isolate the bad fields so the rest still land
+                    entry.failures = 0
+                    if not await self._write_fields(project_id, entry, data):
+                        return
+            if entry.pending:
+                self._schedule(project_id, entry)
+            elif self._entries.get(project_id) is entry:
+                # Burst over: the next update writes through again
+                del self._entries[project_id]
+
+    async def flush_all(self) -> None:
+        """Flush every project. Called from the app lifespan on shutdown."""
+        for project_id in list(self._entries):
+            try:
+                await self.flush(project_id)
+            except Exception as e:
+                print(f"Write buffer flush failed for {project_id}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "buffered_projects": sum(1 for e in self._entries.values() if e.pending),
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+    async def _write_fields(self, project_id: str, entry: _Entry, data: dict) -> bool:
+        """
+        Write `data` one field at a time, dropping fields the database refuses.
+        Returns False if the project is gone or no longer the user's.
+        """
+        for field, value in data.items():
+            if field in entry.pending:
+                continue  # superseded by a newer buffered value
+            try:
+                entry.row = await db_async.update_project_owned(project_id, entry.user_id, {field: value})
+                self.writes += 1
+            except HTTPException as e:
+                if e.status_code in (403, 404):
+                    print(f"Dropping buffered update for {project_id}: {e.detail}")
+                    self._entries.pop(project_id, None)
+                    return False
+                self._reject(project_id, field, str(e.detail))
+        return True
+
+    def _reject(self, project_id: str, field: str, reason: str) -> None:
+        print(f"Write buffer dropped {field} for {project_id}: {reason}")
+        self.rejected += 1
+        self._rejections.setdefault(project_id, {})[field] = reason
+        self._rejections.move_to_end(project_id)
+        while len(self._rejections) > MAX_REPORTED_PROJECTS:
+            self._rejections.popitem(last=False)
+
+    def _report_rejections(self, project_id: str, row: dict) -> dict:
+        rejected = self._rejections.pop(project_id, None)
+        return {**row, "rejected_fields": rejected} if rejected else row
+
+    def _view(self, entry: _Entry) -> dict:
+        return {**entry.row, **entry.pending}
+
+    def _schedule(self, project_id: str, entry: _Entry) -> None:
+        """(Re)arm the debounce timer, capped by the max staleness window."""
+        if entry.timer:
+            entry.timer.cancel()
+        delay = self.debounce
+        if entry.first_pending_at is not None:
+            deadline = entry.first_pending_at + self.max_delay
+            delay = max(0.0, min(delay, deadline - time.monotonic()))
+        # Fires after the request that armed it is over, so it gets no request cache
+        entry.timer = asyncio.get_running_loop().call_later(
+            delay, self._start_flush, project_id, context=db_async.background_context()
+        )
+
+    def _start_flush(self, project_id: str) -> None:
+        task = asyncio.create_task(self._flush_quietly(project_id))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_quietly(self, project_id: str) -> None:
+        try:
+            await self.flush(project_id)
+        except Exception as e:
+            print(f"Write buffer flush failed for {project_id}: {e}")
+
+
+write_buffer = WriteBuffer()
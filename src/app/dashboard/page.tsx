@@ -9,13 +9,16 @@ import { Link } from 'lucide-react';
 export default function DashboardPage() {
     const [projects, setProjects] = useState<any[]>([]);
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const router = useRouter();
 
     useEffect(() => {
         fetchProjects();
     }, []);
 
-    const fetchProjects = async () => {
+    // The API returns one page at a time; X-Next-Cursor points at the next one
+    const fetchProjects = async (cursor?: string) => {
         try {
             const supabase = createClient(
                 process.env.NEXT_PUBLIC_SUPABASE_URL!,
@@ -28,7 +31,8 @@ export default function DashboardPage() {
                 return;
             }
 
-            const res = await fetch('http://localhost:8000/api/projects', {
+            const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+            const res = await fetch(`http://localhost:8000/api/projects${query}`, {
                 headers: {
                     'Authorization': `Bearer ${session.access_token}`
                 }
@@ -36,7 +40,8 @@ export default function DashboardPage() {
 
             if (res.ok) {
                 const data = await res.json();
-                setProjects(data);
+                setProjects((current) => (cursor ? [...current, ...data] : data));
+                setNextCursor(res.headers.get('X-Next-Cursor'));
             }
         } catch (error) {
             console.error('Error fetching projects:', error);
@@ -45,6 +50,13 @@ export default function DashboardPage() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        await fetchProjects(nextCursor);
+        setLoadingMore(false);
+    };
+
     if (loading) return (
         <div className="min-h-screen pt-24 px-4 flex items-center justify-center">
             <div className="w-8 h-8 border-4 border-cobalt border-t-transparent rounded-full animate-spin"></div>
@@ -160,6 +172,18 @@ export default function DashboardPage() {
                     ))}
                 </div>
             )}
+
+            {nextCursor && (
+                <div className="flex justify-center my-12">
+                    <button
+                        onClick={loadMore}
+                        disabled={loadingMore}
+                        className="px-6 py-3 bg-white/5 hover:bg-white/10 border border-white/10 rounded font-mono text-sm text-bone transition-colors disabled:opacity-50"
+                    >
+                        {loadingMore ? 'LOADING...' : 'LOAD_MORE'}
+                    </button>
+                </div>
+            )}
         </div>
     );
 }
@@ -11,12 +11,15 @@ import {
 import { Button } from '@/components/ui/Button';
 import { Card } from '@/components/ui/Card';
 import { GridBackground } from '@/components/backgrounds/GridBackground';
-import { apiClient, Project } from '@/lib/api';
+import { apiClient, Project, AIQuote, QuoteJob } from '@/lib/api';
+import { useWizardStore } from '@/stores/wizardStore';
 import { ContractView, InvoiceView, AnalysisCard } from '@/components/proposal';
 import Link from 'next/link';
 
 type DocumentTab = 'summary' | 'contract' | 'invoice';
 
+const QUOTE_POLL_INTERVAL_MS = 2000;
+
 // Typewriter effect component
 function TypewriterText({ text, delay = 0 }: { text: string; delay?: number }) {
     const [displayedText, setDisplayedText] = useState('');
@@ -156,26 +159,61 @@ export default function DynamicProposalPage() {
     const [isProcessing, setIsProcessing] = useState(false);
     const [activeTab, setActiveTab] = useState<DocumentTab>('summary');
 
-    // Fetch project data
+    // Rule-engine quote from the wizard, shown until the AI quote job finishes
+    const [provisionalQuote, setProvisionalQuote] = useState<AIQuote | null>(() => {
+        const wizard = useWizardStore.getState();
+        return wizard.projectId === projectId ? wizard.aiQuote : null;
+    });
+
+    // Fetch project data, then wait for a running quote job if there is one
     useEffect(() => {
+        let cancelled = false;
+        let poll: ReturnType<typeof setTimeout> | undefined;
+
         async function fetchProject() {
             try {
                 const data = await apiClient.getProject(projectId);
-                setProject(data);
+                if (!cancelled) setProject(data);
             } catch (err) {
-                setError(err instanceof Error ? err.message : 'Failed to load project');
+                if (!cancelled) setError(err instanceof Error ? err.message : 'Failed to load project');
             } finally {
-                setLoading(false);
+                if (!cancelled) setLoading(false);
+            }
+        }
+
+        async function waitForQuote() {
+            let job: QuoteJob;
+            try {
+                job = await apiClient.getQuoteStatus(projectId);
+            } catch {
+                // No quote job for this project (or it has expired): the fetched row is final
+                if (!cancelled) setProvisionalQuote(null);
+                return;
+            }
+            if (cancelled) return;
+            if (job.status === 'queued' || job.status === 'running') {
+                poll = setTimeout(waitForQuote, QUOTE_POLL_INTERVAL_MS);
+                return;
+            }
+            if (job.status === 'failed') {
+                console.error('Quote job failed:', job.error);
             }
+            setProvisionalQuote(null);
+            await fetchProject();
         }
 
         if (projectId) {
             fetchProject();
+            waitForQuote();
         }
+        return () => {
+            cancelled = true;
+            clearTimeout(poll);
+        };
     }, [projectId]);
 
     // Calculate pricing from AI quote or use defaults
-    const aiQuote = project?.ai_price_quote;
+    const aiQuote = provisionalQuote || project?.ai_price_quote;
     const totalPrice = aiQuote?.price || 1200;
     const basePrice = 500;
     const complexityPrice = totalPrice - basePrice;
@@ -270,8 +308,8 @@ and initiates the design phase. Given current demand, estimated delivery is 10-1
                 {project && (
                     <AnalysisCard
                         businessName={project.business_name}
-                        reasoning={project.ai_price_quote?.reasoning || ''}
-                        risks={project.ai_price_quote?.risks}
+                        reasoning={aiQuote?.reasoning || ''}
+                        risks={aiQuote?.risks}
                     />
                 )}
 
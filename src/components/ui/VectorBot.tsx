@@ -21,6 +21,8 @@ export function VectorBot() {
     ]);
     const [inputValue, setInputValue] = useState("");
     const [isTyping, setIsTyping] = useState(false);
+    // Server-side conversation handle (history lives on the backend)
+    const conversationIdRef = useRef<string | undefined>(undefined);
     const messagesEndRef = useRef<HTMLDivElement>(null);
 
     // Get project context if available
@@ -64,11 +66,9 @@ export function VectorBot() {
         setIsTyping(true);
 
         try {
-            // Build history from existing messages (before adding new user message)
-            const history = messages.map(m => ({ role: m.role, content: m.content }));
-
-            // Call VectorBot API with context (current page URL) and history
-            const response = await apiClient.vectorBotChat(userMsg, pathname || undefined, history);
+            // Call VectorBot API with context (current page URL); only the new message is sent
+            const response = await apiClient.vectorBotChat(userMsg, pathname || undefined, conversationIdRef.current);
+            conversationIdRef.current = response.conversation_id;
 
             // Add Assistant Message
             setMessages(prev => [...prev, { role: 'assistant', content: response.reply }]);
@@ -49,6 +49,11 @@ export interface ProjectUpdateData {
     project_scope?: Record<string, unknown>;
 }
 
+export interface WizardDeltaResponse {
+    id: string;
+    discovery_length: number;
+}
+
 export interface Project {
     id: string;
     user_id?: string;
@@ -65,6 +70,18 @@ export interface Project {
     ai_price_quote?: AIQuote;
     wizard_step?: number;
     wizard_data?: Record<string, unknown>;
+    rejected_fields?: Record<string, string>;  // buffered changes the server had to drop
+}
+
+export interface QuoteJob {
+    job_id: string;
+    status: 'queued' | 'running' | 'succeeded' | 'failed';
+    progress: string;
+    error?: string | null;
+}
+
+export interface QueuedQuote extends QuoteJob {
+    provisional_quote: AIQuote;  // rule-engine price, available immediately
 }
 
 export interface DomainCheckResponse {
@@ -196,6 +213,21 @@ class ApiClient {
         });
     }
 
+    async patchWizardData(projectId: string, patch: Record<string, unknown>): Promise<WizardDeltaResponse> {
+        return this.request(`/api/projects/${projectId}/wizard-data`, {
+            method: 'PATCH',
+            headers: { 'Content-Type': 'application/merge-patch+json' },
+            body: JSON.stringify(patch),
+        });
+    }
+
+    async putDiscoveryAnswer(projectId: string, index: number, answer: { q: string; a: string }): Promise<WizardDeltaResponse> {
+        return this.request(`/api/projects/${projectId}/discovery/${index}`, {
+            method: 'PUT',
+            body: JSON.stringify(answer),
+        });
+    }
+
     async getProject(projectId: string): Promise<Project> {
         return this.request(`/api/projects/${projectId}`);
     }
@@ -216,6 +248,18 @@ class ApiClient {
         });
     }
 
+    // Queues the AI quote; poll getQuoteStatus until the job is done
+    async finalizeProjectInBackground(projectId: string): Promise<QueuedQuote> {
+        return this.request(`/api/projects/${projectId}/finalize?background=true`, {
+            method: 'POST',
+        });
+    }
+
+    async getQuoteStatus(projectId: string, jobId?: string): Promise<QuoteJob> {
+        const query = jobId ? `?job_id=${encodeURIComponent(jobId)}` : '';
+        return this.request(`/api/projects/${projectId}/quote/status${query}`);
+    }
+
     async generateProjectQuote(projectId: string): Promise<Project> {
         return this.request(`/api/projects/${projectId}/quote`, {
             method: 'POST',
@@ -240,11 +284,12 @@ class ApiClient {
     async vectorBotChat(
         message: string,
         context?: string,
-        history?: Array<{ role: string; content: string }>
-    ): Promise<{ reply: string }> {
+        conversationId?: string
+    ): Promise<{ reply: string; conversation_id?: string }> {
+        // History is kept server-side under conversation_id
         return this.request('/api/vectorbot', {
             method: 'POST',
-            body: JSON.stringify({ message, context, history: history || [] }),
+            body: JSON.stringify({ message, context, conversation_id: conversationId }),
         });
     }
 }
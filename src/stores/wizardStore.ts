@@ -91,6 +91,14 @@ const initialState = {
     currentSelections: [],
 };
 
+// Discovery deltas are sent in order so a late step-pointer write can't undo a newer answer
+let discoveryWrites: Promise<unknown> = Promise.resolve();
+const queueDiscoveryWrite = (write: () => Promise<unknown>, label: string) => {
+    discoveryWrites = discoveryWrites
+        .then(write)
+        .catch((error) => console.error(`Failed to save ${label}:`, error));
+};
+
 export const useWizardStore = create<WizardState>((set, get) => ({
     ...initialState,
 
@@ -238,7 +246,7 @@ export const useWizardStore = create<WizardState>((set, get) => ({
     },
 
     prevDiscoveryStep: async () => {
-        const { currentDiscoveryStep, discoveryHistory, businessName } = get();
+        const { projectId, currentDiscoveryStep, discoveryHistory, businessName } = get();
         if (currentDiscoveryStep <= 0) return;
 
         // Go back one step
@@ -255,6 +263,17 @@ export const useWizardStore = create<WizardState>((set, get) => ({
             isDiscoveryComplete: false
         });
 
+        // Drop the withdrawn answers server-side too, so quotes never price them
+        if (projectId) {
+            queueDiscoveryWrite(
+                () => apiClient.patchWizardData(projectId, {
+                    discoveryHistory: newHistory,
+                    currentDiscoveryStep: newStep
+                }),
+                'discovery step'
+            );
+        }
+
         try {
             // Re-fetch the question for this previous step
             const response = await apiClient.generateDiscoveryNext(businessName, 'modern web', newStep, newHistory);
@@ -273,7 +292,7 @@ export const useWizardStore = create<WizardState>((set, get) => ({
     },
 
     submitDiscoveryAnswer: async (answer?: string) => {
-        const { currentQuestion, currentDiscoveryStep, discoveryHistory, businessName, currentSelections } = get();
+        const { projectId, currentQuestion, currentDiscoveryStep, discoveryHistory, businessName, currentSelections } = get();
         if (!currentQuestion) return;
 
         // Determine final answer (single arg or multi-select state)
@@ -288,6 +307,15 @@ export const useWizardStore = create<WizardState>((set, get) => ({
         const newHistory = [...discoveryHistory, { q: currentQuestion.text, a: finalAnswer }];
         const nextStep = currentDiscoveryStep + 1;
 
+        // Autosave only the new answer (constant-size write)
+        if (projectId) {
+            const item = { q: currentQuestion.text, a: finalAnswer };
+            queueDiscoveryWrite(
+                () => apiClient.putDiscoveryAnswer(projectId, currentDiscoveryStep, item),
+                'discovery answer'
+            );
+        }
+
         // 2. Check completion (Limit to 10 steps)
         if (nextStep >= 10) {
             set({
@@ -345,6 +373,10 @@ export const useWizardStore = create<WizardState>((set, get) => ({
         set({ projectId, saveStatus: 'saving' });
         try {
             const project = await apiClient.getProject(projectId);
+            const wizardData = (project.wizard_data as any) || {};
+            // History past the step pointer was abandoned by going back
+            const discoveryHistory = (wizardData.discoveryHistory || [])
+                .slice(0, wizardData.currentDiscoveryStep);
 
             // Hydrate Store
             set({
@@ -355,10 +387,10 @@ export const useWizardStore = create<WizardState>((set, get) => ({
                 saveStatus: 'success',
 
                 // Hydrate Discovery History if exists
-                discoveryHistory: (project.wizard_data as any)?.discoveryHistory || [],
-                currentDiscoveryStep: (project.wizard_data as any)?.currentDiscoveryStep || 0,
-                // If discovery is done based on history length or explicit flag (not stored yet, maybe check history length)
-                isDiscoveryComplete: ((project.wizard_data as any)?.discoveryHistory?.length || 0) >= 10
+                discoveryHistory,
+                currentDiscoveryStep: wizardData.currentDiscoveryStep || 0,
+                // Discovery is done once all 10 questions are answered
+                isDiscoveryComplete: discoveryHistory.length >= 10
             });
         } catch (error) {
             console.error('Failed to init project:', error);
@@ -367,21 +399,25 @@ export const useWizardStore = create<WizardState>((set, get) => ({
     },
 
     saveStep: async () => {
-        const { projectId, businessName, selectedVibe, domain, currentStep, discoveryHistory, currentDiscoveryStep } = get();
+        const { projectId, businessName, selectedVibe, domain, currentStep } = get();
         if (!projectId) return;
 
         set({ saveStatus: 'saving' });
         try {
-            await apiClient.updateProject(projectId, {
+            const saved = await apiClient.updateProject(projectId, {
                 business_name: businessName,
                 vibe_style: selectedVibe || undefined,
                 domain_choice: domain,
-                wizard_step: currentStep,
-                wizard_data: {
-                    discoveryHistory,
-                    currentDiscoveryStep
-                }
+                wizard_step: currentStep
+                // wizard_data is saved incrementally (putDiscoveryAnswer / patchWizardData)
             });
+            if (saved.rejected_fields) {
+                const fields = Object.keys(saved.rejected_fields).join(', ');
+                console.error('Server dropped earlier changes:', saved.rejected_fields);
+                set({ saveStatus: 'error', saveError: `Some changes could not be saved (${fields})` });
+                toast.error(`Some changes could not be saved: ${fields}`);
+                return;
+            }
             set({ saveStatus: 'success' });
             toast.success('Progress saved');
         } catch (error) {
@@ -395,8 +431,9 @@ export const useWizardStore = create<WizardState>((set, get) => ({
         if (!projectId) return;
         set({ saveStatus: 'saving' });
         try {
-            await apiClient.finalizeProject(projectId);
-            set({ saveStatus: 'success' });
+            // The AI narrative is written by a background job; the proposal page polls for it
+            const queued = await apiClient.finalizeProjectInBackground(projectId);
+            set({ saveStatus: 'success', aiQuote: queued.provisional_quote });
         } catch (error) {
             console.error('Failed to generate quote:', error);
             set({ saveStatus: 'error', saveError: 'Failed to generate quote' });
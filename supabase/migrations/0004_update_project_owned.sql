@@ -0,0 +1,57 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - Owner-Scoped Project Update
+-- Migration: 0004_update_project_owned
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- Updates a project only if it belongs to p_user_id, in one filtered UPDATE.
+-- Only when nothing matched does it look up the id, so callers can tell
+-- "not found" from "not yours" without a second round trip.
+--
+-- Returns: {"status": "updated" | "not_found" | "forbidden", "project": row | null}
+CREATE OR REPLACE FUNCTION public.update_project_owned(p_id UUID, p_user_id UUID, p_data JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_columns TEXT;
+    v_project JSONB;
+BEGIN
+    -- Columns to set, restricted to real columns of public.projects
+    SELECT string_agg(quote_ident(a.attname), ', ')
+      INTO v_columns
+      FROM pg_attribute a
+     WHERE a.attrelid = 'public.projects'::regclass
+       AND a.attnum > 0
+       AND NOT a.attisdropped
+       AND a.attname <> 'id'
+       AND p_data ? a.attname;
+
+    IF v_columns IS NULL THEN
+        SELECT to_jsonb(p.*) INTO v_project
+          FROM public.projects p
+         WHERE p.id = p_id AND p.user_id = p_user_id;
+    ELSE
+        EXECUTE format(
+            'UPDATE public.projects AS p SET (%s) = (SELECT %s FROM jsonb_populate_record(NULL::public.projects, $1))
+              WHERE p.id = $2 AND p.user_id = $3
+          RETURNING to_jsonb(p.*)',
+            v_columns, v_columns
+        )
+        INTO v_project
+        USING p_data, p_id, p_user_id;
+    END IF;
+
+    IF v_project IS NOT NULL THEN
+        RETURN jsonb_build_object('status', 'updated', 'project', v_project);
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM public.projects WHERE id = p_id) THEN
+        RETURN jsonb_build_object('status', 'forbidden', 'project', NULL);
+    END IF;
+    RETURN jsonb_build_object('status', 'not_found', 'project', NULL);
+END;
+$$;
+
+-- Takes the owner as a parameter, so only the backend's service role may call it
+REVOKE EXECUTE ON FUNCTION public.update_project_owned(UUID, UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.update_project_owned(UUID, UUID, JSONB) TO service_role;
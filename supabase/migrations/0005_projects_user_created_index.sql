@@ -0,0 +1,9 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - Project Listing Index
+-- Migration: 0005_projects_user_created_index
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- Serves GET /api/projects: filter on user_id, newest first, keyset cursor on
+-- (created_at, id). The id tie-breaker keeps pages stable for equal timestamps.
+CREATE INDEX IF NOT EXISTS idx_projects_user_created
+    ON public.projects (user_id, created_at DESC, id DESC);
@@ -0,0 +1,126 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - Wizard Data Delta Updates
+-- Migration: 0006_wizard_data_deltas
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- Autosave used to send (and rewrite) the whole wizard_data blob on every step.
+-- These functions apply small deltas server-side instead. Both are owner-scoped
+-- like update_project_owned and return:
+--   {"status": "updated" | "not_found" | "forbidden", "discovery_length": int | null}
+
+-- ──────────────────────────────────────────────────────────────────────────────
+-- RFC 7396 JSON Merge Patch: objects merge recursively, null deletes a key,
+-- anything else (including arrays) replaces.
+-- ──────────────────────────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.jsonb_merge_patch(target JSONB, patch JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+    v_result JSONB;
+    v_key TEXT;
+    v_value JSONB;
+BEGIN
+    IF patch IS NULL OR jsonb_typeof(patch) <> 'object' THEN
+        RETURN patch;
+    END IF;
+
+    v_result := CASE WHEN jsonb_typeof(target) = 'object' THEN target ELSE '{}'::jsonb END;
+    FOR v_key, v_value IN SELECT * FROM jsonb_each(patch) LOOP
+        IF jsonb_typeof(v_value) = 'null' THEN
+            v_result := v_result - v_key;
+        ELSE
+            v_result := jsonb_set(v_result, ARRAY[v_key], public.jsonb_merge_patch(v_result -> v_key, v_value));
+        END IF;
+    END LOOP;
+    RETURN v_result;
+END;
+$$;
+
+-- ──────────────────────────────────────────────────────────────────────────────
+-- Shared result builder for the owner-scoped writes below
+-- ──────────────────────────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public._wizard_write_result(p_id UUID, p_wizard_data JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+    IF p_wizard_data IS NOT NULL THEN
+        RETURN jsonb_build_object(
+            'status', 'updated',
+            'discovery_length', jsonb_array_length(COALESCE(p_wizard_data -> 'discoveryHistory', '[]'::jsonb))
+        );
+    END IF;
+    IF EXISTS (SELECT 1 FROM public.projects WHERE id = p_id) THEN
+        RETURN jsonb_build_object('status', 'forbidden', 'discovery_length', NULL);
+    END IF;
+    RETURN jsonb_build_object('status', 'not_found', 'discovery_length', NULL);
+END;
+$$;
+
+-- ──────────────────────────────────────────────────────────────────────────────
+-- Merge-patch wizard_data
+-- ──────────────────────────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.patch_project_wizard_data(p_id UUID, p_user_id UUID, p_patch JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_wizard_data JSONB;
+BEGIN
+    UPDATE public.projects
+       SET wizard_data = public.jsonb_merge_patch(COALESCE(wizard_data, '{}'::jsonb), p_patch)
+     WHERE id = p_id AND user_id = p_user_id
+ RETURNING wizard_data INTO v_wizard_data;
+
+    RETURN public._wizard_write_result(p_id, v_wizard_data);
+END;
+$$;
+
+-- ──────────────────────────────────────────────────────────────────────────────
+-- Record the answer to discovery question p_index (0-based). Later answers are
+-- dropped, so re-answering after going back truncates the history.
+-- ──────────────────────────────────────────────────────────────────────────────
+CREATE OR REPLACE FUNCTION public.put_discovery_answer(p_id UUID, p_user_id UUID, p_index INTEGER, p_item JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_wizard_data JSONB;
+BEGIN
+    UPDATE public.projects
+       SET wizard_data = jsonb_set(
+               jsonb_set(
+                   COALESCE(wizard_data, '{}'::jsonb),
+                   '{discoveryHistory}',
+                   COALESCE((
+                       SELECT jsonb_agg(item ORDER BY ord)
+                         FROM jsonb_array_elements(COALESCE(wizard_data -> 'discoveryHistory', '[]'::jsonb))
+                              WITH ORDINALITY AS h(item, ord)
+                        WHERE ord <= p_index
+                   ), '[]'::jsonb) || jsonb_build_array(p_item)
+               ),
+               '{currentDiscoveryStep}',
+               to_jsonb(p_index + 1)
+           )
+     WHERE id = p_id AND user_id = p_user_id
+       AND p_index <= jsonb_array_length(COALESCE(wizard_data -> 'discoveryHistory', '[]'::jsonb))
+ RETURNING wizard_data INTO v_wizard_data;
+
+    IF v_wizard_data IS NULL AND EXISTS (SELECT 1 FROM public.projects WHERE id = p_id AND user_id = p_user_id) THEN
+        -- Owned, but the index would leave a gap in the history
+        RETURN jsonb_build_object('status', 'conflict', 'discovery_length', NULL);
+    END IF;
+    RETURN public._wizard_write_result(p_id, v_wizard_data);
+END;
+$$;
+
+-- These take the owner as a parameter, so only the backend's service role may call them
+REVOKE EXECUTE ON FUNCTION public._wizard_write_result(UUID, JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.patch_project_wizard_data(UUID, UUID, JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.put_discovery_answer(UUID, UUID, INTEGER, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public._wizard_write_result(UUID, JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION public.patch_project_wizard_data(UUID, UUID, JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION public.put_discovery_answer(UUID, UUID, INTEGER, JSONB) TO service_role;
@@ -0,0 +1,25 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - Stripe Webhook Event Log
+-- Migration: 0007_stripe_events
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- One row per unique Stripe event id. The webhook inserts with ON CONFLICT DO
+-- NOTHING, so redelivered events are acknowledged without being processed again.
+-- Rows still 'pending' are picked up again when the backend restarts.
+CREATE TABLE IF NOT EXISTS public.stripe_events (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    project_id TEXT,
+    status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'processed', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    received_at TIMESTAMPTZ DEFAULT NOW() NOT NULL,
+    processed_at TIMESTAMPTZ
+);
+
+-- Backend (service role) only: no policies for anon/authenticated
+ALTER TABLE public.stripe_events ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_stripe_events_pending
+    ON public.stripe_events (received_at)
+    WHERE status = 'pending';
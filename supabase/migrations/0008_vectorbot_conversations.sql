@@ -0,0 +1,20 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - VectorBot Conversation Store
+-- Migration: 0008_vectorbot_conversations
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- Backing table for VECTORBOT_STORE_BACKEND=postgres. Holds the compacted
+-- message history per conversation id; rows past expires_at are ignored.
+CREATE TABLE IF NOT EXISTS public.vectorbot_conversations (
+    id TEXT PRIMARY KEY,
+    messages JSONB NOT NULL DEFAULT '[]'::jsonb,
+    expires_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+-- Backend (service role) only: no policies for anon/authenticated
+ALTER TABLE public.vectorbot_conversations ENABLE ROW LEVEL SECURITY;
+
+-- For periodic cleanup: DELETE FROM public.vectorbot_conversations WHERE expires_at < NOW();
+CREATE INDEX IF NOT EXISTS idx_vectorbot_conversations_expires
+    ON public.vectorbot_conversations (expires_at);
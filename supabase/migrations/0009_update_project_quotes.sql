@@ -0,0 +1,35 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - Bulk Quote Updates
+-- Migration: 0009_update_project_quotes
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- Batch re-quoting writes a different quote to each project in one statement.
+-- Only the ai_* quote columns are set, only on existing projects that are still
+-- unpaid and in one of p_from_statuses (checked by the UPDATE itself, so a
+-- concurrent payment or status change wins). Nothing is ever inserted.
+--
+-- p_rows: [{"id": ..., "ai_price_quote": ..., "ai_features": ..., ...}, ...]
+-- Returns the updated rows.
+CREATE OR REPLACE FUNCTION public.update_project_quotes(p_rows JSONB, p_from_statuses TEXT[])
+RETURNS SETOF public.projects
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE public.projects AS p
+       SET ai_price_quote = q.ai_price_quote,
+           ai_features = q.ai_features,
+           ai_reasoning = q.ai_reasoning,
+           ai_suggested_stack = q.ai_suggested_stack,
+           ai_risks = q.ai_risks
+      FROM jsonb_populate_recordset(NULL::public.projects, p_rows) AS q
+     WHERE p.id = q.id
+       AND p.deposit_paid = FALSE
+       AND p.status = ANY(p_from_statuses)
+ RETURNING p.*;
+END;
+$$;
+
+-- Writes any project, so only the backend's service role may call it
+REVOKE EXECUTE ON FUNCTION public.update_project_quotes(JSONB, TEXT[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.update_project_quotes(JSONB, TEXT[]) TO service_role;
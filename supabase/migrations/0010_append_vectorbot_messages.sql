@@ -0,0 +1,52 @@
+-- ══════════════════════════════════════════════════════════════════════════════
+-- VectorWeb Labs - Atomic VectorBot History Appends
+-- Migration: 0010_append_vectorbot_messages
+-- ══════════════════════════════════════════════════════════════════════════════
+
+-- Appending a turn used to read the whole history and write it back, so two
+-- concurrent turns in one conversation lost one. This appends in a single
+-- statement (messages = messages || p_messages) under the row lock.
+--
+-- p_seed is the history to start from when the conversation does not exist
+-- (or has expired). Past p_max_messages only the newest p_keep_messages are
+-- kept, matching conversations._compact. Returns the stored messages.
+CREATE OR REPLACE FUNCTION public.append_vectorbot_messages(
+    p_id TEXT,
+    p_messages JSONB,
+    p_seed JSONB,
+    p_expires_at TIMESTAMPTZ,
+    p_max_messages INTEGER,
+    p_keep_messages INTEGER
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_messages JSONB;
+    v_length INTEGER;
+BEGIN
+    INSERT INTO public.vectorbot_conversations AS c (id, messages, expires_at)
+    VALUES (p_id, COALESCE(p_seed, '[]'::jsonb) || p_messages, p_expires_at)
+    ON CONFLICT (id) DO UPDATE
+       SET messages = CASE WHEN c.expires_at > NOW() THEN c.messages ELSE COALESCE(p_seed, '[]'::jsonb) END
+                      || p_messages,
+           expires_at = EXCLUDED.expires_at
+ RETURNING messages INTO v_messages;
+
+    v_length := jsonb_array_length(v_messages);
+    IF v_length > p_max_messages THEN
+        SELECT jsonb_agg(item ORDER BY ord)
+          INTO v_messages
+          FROM jsonb_array_elements(v_messages) WITH ORDINALITY AS m(item, ord)
+         WHERE ord > v_length - p_keep_messages;
+
+        UPDATE public.vectorbot_conversations SET messages = v_messages WHERE id = p_id;
+    END IF;
+
+    RETURN v_messages;
+END;
+$$;
+
+-- Backend (service role) only, like the table itself
+REVOKE EXECUTE ON FUNCTION public.append_vectorbot_messages(TEXT, JSONB, JSONB, TIMESTAMPTZ, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.append_vectorbot_messages(TEXT, JSONB, JSONB, TIMESTAMPTZ, INTEGER, INTEGER) TO service_role;